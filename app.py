@@ -9,10 +9,13 @@ import os
 
 # Import custom modules
 from data_fetcher import DataFetcher
-from ml_predictor import MLPredictor
-from chart_generator import ChartGenerator
+from ml_predictor import MLPredictor, FORECAST_HORIZON, MAX_FORECAST_HORIZON
+from batch_predictor import BatchPredictor
+from chart_generator import ChartGenerator, TECHNICAL_CHART_INDICATORS, VOLUME_CHART_INDICATORS
 from portfolio_manager import PortfolioManager
+from holdings import Holdings
 from technical_indicators import TechnicalIndicators
+from frame_view import JoinedFrame
 from utils import format_currency, format_percentage, get_market_status
 from stock_tickers import search_tickers, get_popular_tickers, get_micro_stocks
 
@@ -27,6 +30,8 @@ st.set_page_config(
 # Initialize session state
 if 'portfolio' not in st.session_state:
     st.session_state.portfolio = []
+if 'positions' not in st.session_state:
+    st.session_state.positions = {}
 if 'selected_stock' not in st.session_state:
     st.session_state.selected_stock = 'AAPL'
 if 'last_update' not in st.session_state:
@@ -42,14 +47,16 @@ if 'last_selected_stock' not in st.session_state:
 @st.cache_resource
 def initialize_components():
     api_key = os.getenv("ALPHA_VANTAGE_API_KEY", "demo")
-    data_fetcher = DataFetcher(api_key)
+    compact = os.getenv("DASHBOARD_COMPACT_FRAMES", "0") == "1"
+    data_fetcher = DataFetcher(api_key, stale_while_revalidate=True, compact=compact)
     ml_predictor = MLPredictor()
     chart_generator = ChartGenerator()
     portfolio_manager = PortfolioManager()
-    technical_indicators = TechnicalIndicators()
-    return data_fetcher, ml_predictor, chart_generator, portfolio_manager, technical_indicators
+    technical_indicators = TechnicalIndicators(compact=compact)
+    batch_predictor = BatchPredictor()
+    return data_fetcher, ml_predictor, chart_generator, portfolio_manager, technical_indicators, batch_predictor
 
-data_fetcher, ml_predictor, chart_generator, portfolio_manager, technical_indicators = initialize_components()
+data_fetcher, ml_predictor, chart_generator, portfolio_manager, technical_indicators, batch_predictor = initialize_components()
 
 # Main app
 def main():
@@ -218,6 +225,12 @@ def main():
             index=2
         )
         
+        # Forecast horizon
+        forecast_horizon = st.slider("Forecast Horizon (days)", min_value=1, max_value=MAX_FORECAST_HORIZON, value=FORECAST_HORIZON)
+        
+        # Model backend
+        model_backend = st.selectbox("Prediction Model", list(ml_predictor.backends), index=0)
+        
         # Auto-refresh toggle
         auto_refresh = st.checkbox("Auto Refresh (30s)", value=False)
         
@@ -290,8 +303,19 @@ def main():
                 st.error(f"No historical data available for {stock_symbol}.")
                 return
             
+            # Start the portfolio quote fetches only now, behind the selected stock's
+            # interactive requests, so they load while the rest of the page renders
+            portfolio_rows = portfolio_manager.iter_portfolio_performance(st.session_state.portfolio, data_fetcher)
+            
             st.session_state.last_update = datetime.now()
             
+            # Stale data is served instantly while a background refresh runs
+            data_statuses = {current_data.get('data_status'), historical_data.attrs.get('data_status')}
+            if 'refreshing' in data_statuses:
+                st.caption("🔄 Showing cached data while fresh data loads in the background")
+            elif 'stale' in data_statuses:
+                st.caption("⚠️ Showing cached data; the latest refresh failed")
+            
         except Exception as e:
             st.error(f"Error fetching data: {str(e)}")
             return
@@ -318,15 +342,24 @@ def main():
     
     # Technical indicators
     with st.spinner("Calculating technical indicators..."):
-        indicators = technical_indicators.calculate_indicators(historical_data)
-        historical_data = pd.concat([historical_data, indicators], axis=1)
+        chart_columns = TECHNICAL_CHART_INDICATORS + VOLUME_CHART_INDICATORS
+        # Only the columns the chart tabs draw; shared intermediates are memoized.
+        # 1D uses this path too: its window is a fixed 100-bar ring buffer whose
+        # front moves with every new bar, so the streaming engine would rebuild
+        indicators = technical_indicators.calculate_indicators(
+            historical_data, columns=chart_columns, key=f"{stock_symbol}_{time_period}"
+        )
+        # Join prices and indicators lazily instead of copying both into one frame
+        historical_data = JoinedFrame(historical_data, indicators)
     
     # ML Predictions
     st.subheader("🤖 AI Price Predictions")
     
     with st.spinner("Training ML model and generating predictions..."):
         try:
-            predictions = ml_predictor.predict_prices(historical_data)
+            predictions = ml_predictor.predict_prices(
+                historical_data, stock_symbol, time_period, forecast_horizon, model_backend
+            )
             
             if 'error' in predictions:
                 st.error(f"Prediction Error: {predictions['error']}")
@@ -345,6 +378,12 @@ def main():
                     accuracy = predictions.get('accuracy', 0)
                     st.metric("Model Accuracy", f"{accuracy:.1%}")
                 
+                if 'pending_backend' in predictions:
+                    st.caption(
+                        f"⏳ Training {predictions['pending_backend']} in the background; "
+                        f"showing the {predictions['backend']} model for now"
+                    )
+                
                 # Additional prediction info
                 if 'lower_bound' in predictions and 'upper_bound' in predictions:
                     st.info(f"📊 **Price Range Prediction:** ${predictions['lower_bound']:.2f} - ${predictions['upper_bound']:.2f}")
@@ -354,6 +393,24 @@ def main():
                     historical_data, predictions, stock_symbol
                 )
                 st.plotly_chart(pred_fig, use_container_width=True)
+                
+                # Declared vs measured cost per backend, to pick a model by accuracy per ms
+                with st.expander("⏱️ Model Backend Timings"):
+                    st.dataframe(pd.DataFrame(ml_predictor.backend_stats()).T, use_container_width=True)
+                
+                # Out-of-sample track record of the same model over time
+                with st.expander("🧪 Walk-Forward Evaluation"):
+                    wf_mode = st.radio("Training window", ["expanding", "rolling"], horizontal=True)
+                    evaluation = ml_predictor.walk_forward(historical_data, wf_mode)
+                    
+                    if 'error' in evaluation:
+                        st.warning(evaluation['error'])
+                    else:
+                        col1, col2, col3 = st.columns(3)
+                        col1.metric("Steps", evaluation['steps'])
+                        col2.metric("Mean Absolute Error", format_currency(evaluation['mae']))
+                        col3.metric("Direction Hit Rate", f"{evaluation['hit_rate']:.1%}")
+                        st.line_chart(evaluation['errors'])
             
         except Exception as e:
             st.error(f"Error generating predictions: {str(e)}")
@@ -380,31 +437,84 @@ def main():
     if st.session_state.portfolio:
         st.subheader("📊 Portfolio Performance")
         
-        with st.spinner("Loading portfolio data..."):
-            portfolio_data = portfolio_manager.get_portfolio_performance(
-                st.session_state.portfolio, data_fetcher
+        # Shares and average cost per symbol; one share at unknown cost until edited
+        positions = st.session_state.positions
+        with st.expander("Positions"):
+            positions_df = st.data_editor(
+                pd.DataFrame({
+                    'symbol': st.session_state.portfolio,
+                    'quantity': [positions.get(s, (1.0, np.nan))[0] for s in st.session_state.portfolio],
+                    'average_cost': [positions.get(s, (1.0, np.nan))[1] for s in st.session_state.portfolio]
+                }).astype({'quantity': float, 'average_cost': float}),
+                disabled=['symbol'],
+                hide_index=True,
+                use_container_width=True,
+                key=f"positions_{'_'.join(st.session_state.portfolio)}"
             )
+        for symbol, quantity, average_cost in positions_df.itertuples(index=False):
+            positions[symbol] = (quantity, average_cost)
+        holdings = Holdings.from_lots(
+            positions_df['symbol'], positions_df['quantity'].fillna(0), positions_df['average_cost']
+        )
+        
+        # Quotes arrive concurrently; each one repaints the summary and table placeholders
+        summary_placeholder = st.empty()
+        table_placeholder = st.empty()
+        table_placeholder.info("Loading portfolio data...")
+        
+        rows = {}
+        for row in portfolio_rows:
+            rows[row['symbol']] = row
+            portfolio_data = [rows[s] for s in st.session_state.portfolio if s in rows]
             
-            if portfolio_data:
+            metrics = portfolio_manager.calculate_portfolio_metrics(portfolio_data, holdings)
+            
+            with summary_placeholder.container():
                 # Portfolio summary
-                col1, col2, col3 = st.columns(3)
+                col1, col2, col3, col4 = st.columns(4)
                 
                 with col1:
-                    total_value = sum(stock['current_price'] for stock in portfolio_data)
-                    st.metric("Total Portfolio Value", format_currency(total_value))
+                    st.metric("Total Portfolio Value", format_currency(metrics.get('total_value', 0)))
                 
                 with col2:
-                    total_change = sum(stock['change'] for stock in portfolio_data)
-                    st.metric("Total Change", format_currency(total_change))
+                    st.metric("Total Change", format_currency(metrics.get('total_change', 0)))
                 
                 with col3:
-                    avg_change_percent = np.mean([stock['change_percent'] for stock in portfolio_data])
-                    st.metric("Average Change %", format_percentage(avg_change_percent))
+                    st.metric("Average Change %", format_percentage(metrics.get('average_change_percent', 0)))
                 
-                # Portfolio table
-                portfolio_df = pd.DataFrame(portfolio_data)
-                st.dataframe(
-                    portfolio_df[['symbol', 'current_price', 'change', 'change_percent', 'volume']],
+                with col4:
+                    st.metric("Unrealized P&L", format_currency(metrics.get('unrealized_pnl', 0)))
+            
+            # Portfolio table
+            portfolio_df = pd.DataFrame(portfolio_data)
+            table_placeholder.dataframe(
+                portfolio_df[['symbol', 'current_price', 'change', 'change_percent', 'volume']],
+                use_container_width=True
+            )
+        
+        # Portfolio predictions, filled in as each worker process finishes
+        if st.checkbox("Show AI predictions for portfolio", value=False):
+            # Worker processes only start once predictions are first asked for,
+            # and spin up while the portfolio history is fetched
+            batch_predictor.warm_up()
+            portfolio_history = data_fetcher.get_historical_batch(st.session_state.portfolio, time_period)
+            prediction_table = st.empty()
+            prediction_rows = {}
+            
+            for symbol, prediction in batch_predictor.predict_batch(portfolio_history, time_period, forecast_horizon):
+                if 'error' in prediction:
+                    prediction_rows[symbol] = {'symbol': symbol, 'next_day': None, 'lower_bound': None,
+                                               'upper_bound': None, 'confidence': None}
+                else:
+                    prediction_rows[symbol] = {
+                        'symbol': symbol,
+                        'next_day': prediction['next_day'],
+                        'lower_bound': prediction['lower_bound'],
+                        'upper_bound': prediction['upper_bound'],
+                        'confidence': prediction['confidence']
+                    }
+                prediction_table.dataframe(
+                    pd.DataFrame([prediction_rows[s] for s in st.session_state.portfolio if s in prediction_rows]),
                     use_container_width=True
                 )
     
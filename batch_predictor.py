@@ -0,0 +1,120 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from ml_predictor import MLPredictor, FORECAST_HORIZON
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Each worker holds its own copy of pandas/sklearn and an MLPredictor, so keep the pool small
+DEFAULT_MAX_WORKERS = 2
+
+# One predictor per worker process, so its caches survive across tasks
+_worker_predictor = None
+
+
+def _predict_from_shared_memory(shm_name, n_rows, symbol, period, horizon):
+    """Worker entry point: rebuild the symbol's frame from shared memory and predict"""
+    global _worker_predictor
+    if _worker_predictor is None:
+        _worker_predictor = MLPredictor()
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # Layout: int64 timestamps followed by a row-major float64 OHLCV block
+        dates = np.ndarray((n_rows,), dtype='i8', buffer=shm.buf)
+        values = np.ndarray((n_rows, len(PRICE_COLUMNS)), dtype='f8', buffer=shm.buf, offset=n_rows * 8)
+        df = pd.DataFrame(
+            values.copy(), columns=PRICE_COLUMNS,
+            index=pd.DatetimeIndex(dates.astype('datetime64[ns]'), name='date')
+        )
+        del dates, values
+    finally:
+        shm.close()
+
+    return _worker_predictor.predict_prices(df, symbol, period, horizon)
+
+
+def _warm_up():
+    """No-op task; running it imports this module (and pandas/sklearn) in a worker"""
+    return True
+
+
+class BatchPredictor:
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+        self._executor = None
+        self._warmed_up = False
+
+    @property
+    def executor(self):
+        # Spawned (not forked) workers: the Streamlit server is multi-threaded
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+
+    def warm_up(self):
+        """Start the worker processes in the background so the first batch doesn't pay for it"""
+        if self._warmed_up:
+            return
+        self._warmed_up = True
+        for _ in range(self.max_workers):
+            self.executor.submit(_warm_up)
+
+    def _to_shared_memory(self, data):
+        """Copy a frame's index and OHLCV values into a new shared memory block"""
+        n_rows = len(data)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, n_rows * 8 * (1 + len(PRICE_COLUMNS))))
+        dates = np.ndarray((n_rows,), dtype='i8', buffer=shm.buf)
+        values = np.ndarray((n_rows, len(PRICE_COLUMNS)), dtype='f8', buffer=shm.buf, offset=n_rows * 8)
+        dates[:] = data.index.values.astype('datetime64[ns]').astype('i8')
+        for i, col in enumerate(PRICE_COLUMNS):
+            values[:, i] = data[col].to_numpy(dtype=float)
+        del dates, values
+        return shm
+
+    def predict_batch(self, data_by_symbol, period=None, horizon=FORECAST_HORIZON):
+        """Predict every symbol in worker processes, yielding (symbol, result) as each completes"""
+        blocks = {}
+        futures = {}
+        try:
+            for symbol, data in data_by_symbol.items():
+                if data is None or data.empty:
+                    yield symbol, {'error': 'No data provided'}
+                    continue
+
+                shm = self._to_shared_memory(data)
+                blocks[symbol] = shm
+                future = self.executor.submit(
+                    _predict_from_shared_memory, shm.name, len(data), symbol, period, horizon
+                )
+                futures[future] = symbol
+
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'error': f'Prediction failed: {str(e)}'}
+                finally:
+                    shm = blocks.pop(symbol)
+                    shm.close()
+                    shm.unlink()
+                yield symbol, result
+        finally:
+            # Release blocks of tasks that never finished (e.g. the caller stopped early)
+            for future, symbol in futures.items():
+                future.cancel()
+            for shm in blocks.values():
+                shm.close()
+                shm.unlink()
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._warmed_up = False
@@ -0,0 +1,54 @@
+"""Time the vectorized CCI mean deviation against the rolling().apply it replaced
+
+Run from the repository root: python benchmarks/bench_cci.py
+"""
+import os
+import sys
+import timeit
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from technical_indicators import TechnicalIndicators
+
+SIZES = (5_000, 50_000)
+PERIOD = 20
+
+
+def make_typical_price(n_rows, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n_rows)))
+    high = close * (1 + rng.uniform(0, 0.01, n_rows))
+    low = close * (1 - rng.uniform(0, 0.01, n_rows))
+    return pd.Series((high + low + close) / 3, index=pd.date_range('2000-01-03', periods=n_rows, freq='min'))
+
+
+def cci_rolling_apply(typical_price, period=PERIOD):
+    """The previous implementation, one Python call per window"""
+    sma = typical_price.rolling(window=period).mean()
+    mean_deviation = typical_price.rolling(window=period).apply(lambda x: np.abs(x - x.mean()).mean())
+    return (typical_price - sma) / (0.015 * mean_deviation)
+
+
+def best_of(func, repeat, number=1):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def main():
+    indicators = TechnicalIndicators()
+    for n_rows in SIZES:
+        typical_price = make_typical_price(n_rows)
+
+        pd.testing.assert_series_equal(
+            indicators._calculate_cci(typical_price, PERIOD), cci_rolling_apply(typical_price), rtol=1e-10
+        )
+
+        old = best_of(lambda: cci_rolling_apply(typical_price), repeat=3)
+        new = best_of(lambda: indicators._calculate_cci(typical_price, PERIOD), repeat=5, number=10)
+        print(f"{n_rows:>6} rows  rolling.apply {old * 1000:8.1f} ms  vectorized {new * 1000:6.1f} ms  ({old / new:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Time the vectorized Alpha Vantage parser against the row loop it replaced
+
+Run from the repository root: python benchmarks/bench_parse_time_series.py
+"""
+import os
+import sys
+import gzip
+import json
+import timeit
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_fetcher import DataFetcher
+
+# 5000 daily bars in the 'Time Series (Daily)' response layout, newest first
+FIXTURE = os.path.join(ROOT, 'benchmarks', 'fixtures', 'time_series_daily_5000.json.gz')
+
+
+def parse_time_series_loop(time_series):
+    """The previous per-row parser, kept here as the baseline"""
+    df_data = []
+    for date_str, values in time_series.items():
+        try:
+            df_data.append({
+                'date': pd.to_datetime(date_str),
+                'open': float(values.get('1. open', 0)),
+                'high': float(values.get('2. high', 0)),
+                'low': float(values.get('3. low', 0)),
+                'close': float(values.get('4. close', 0)),
+                'volume': int(values.get('5. volume', 0))
+            })
+        except (ValueError, KeyError):
+            continue
+
+    if not df_data:
+        return None
+
+    df = pd.DataFrame(df_data)
+    df.set_index('date', inplace=True)
+    df.sort_index(inplace=True)
+    return df
+
+
+def best_of(func, repeat, number=1):
+    return min(timeit.repeat(func, repeat=repeat, number=number)) / number
+
+
+def main():
+    with gzip.open(FIXTURE, 'rt') as f:
+        time_series = json.load(f)['Time Series (Daily)']
+    fetcher = DataFetcher.__new__(DataFetcher)
+
+    # Both parsers must produce the same frame before their timings mean anything
+    pd.testing.assert_frame_equal(fetcher._parse_time_series(time_series), parse_time_series_loop(time_series))
+
+    loop = best_of(lambda: parse_time_series_loop(time_series), repeat=3)
+    vectorized = best_of(lambda: fetcher._parse_time_series(time_series), repeat=5, number=10)
+    print(f"rows:       {len(time_series)}")
+    print(f"row loop:   {loop * 1000:9.1f} ms")
+    print(f"vectorized: {vectorized * 1000:9.1f} ms  ({loop / vectorized:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
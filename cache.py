@@ -0,0 +1,177 @@
+import sys
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+import pandas as pd
+
+
+def estimate_size(value):
+    """Estimate the memory footprint of a cached value in bytes"""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sys.getsizeof(k) + estimate_size(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class LRUCache:
+    def __init__(self, ttl=300, max_entries=256, max_bytes=None, max_stale=0):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Expired entries are kept this many seconds longer for stale reads
+        self.max_stale = max_stale
+        self._entries = OrderedDict()  # key -> (value, timestamp, size)
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, default=None):
+        """Get a value that has not expired, refreshing its recency"""
+        value, fresh = self._lookup(key, allow_stale=False)
+        return value if fresh else default
+
+    def get_stale(self, key):
+        """Get (value, is_fresh), serving expired values within the max_stale window"""
+        return self._lookup(key, allow_stale=True)
+
+    def _lookup(self, key, allow_stale):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+
+            value, timestamp, size = entry
+            age = time.time() - timestamp
+            if self.ttl is not None and age >= self.ttl:
+                if age >= self.ttl + self.max_stale:
+                    self._remove(key)
+                    self.expirations += 1
+                    self.misses += 1
+                    return None, False
+                if not allow_stale:
+                    self.misses += 1
+                    return None, False
+
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                return value, False
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value, True
+
+    def set(self, key, value):
+        """Store a value, evicting least recently used entries to stay within budget"""
+        size = estimate_size(value)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            # A single value larger than the whole budget is not worth caching
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+
+            self._entries[key] = (value, time.time(), size)
+            self.current_bytes += size
+            self._evict()
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (
+                self.ttl is None or time.time() - entry[1] < self.ttl
+            )
+
+    def __len__(self):
+        return len(self._entries)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            value = self._entries[key][0]
+            self._remove(key)
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self.current_bytes -= size
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self.current_bytes > self.max_bytes)
+        ):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def stats(self):
+        """Get hit/miss/eviction counters and memory usage"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+class SingleFlight:
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, func, *args):
+        """Run func(*args) once per key at a time; concurrent callers share the result"""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def in_flight(self, key):
+        """Check whether a call for key is currently running"""
+        with self._lock:
+            return key in self._calls
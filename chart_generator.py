@@ -5,6 +5,10 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 
+# Indicator columns each chart reads, so callers can compute only those
+TECHNICAL_CHART_INDICATORS = ['ma_5', 'ma_10', 'ma_20', 'bb_upper', 'bb_lower']
+VOLUME_CHART_INDICATORS = ['volume_ma']
+
 class ChartGenerator:
     def __init__(self):
         self.colors = {
@@ -288,12 +292,27 @@ class ChartGenerator:
         # Future predictions
         if 'future_predictions' in predictions:
             future_dates = [last_date + timedelta(days=i+1) for i in range(len(predictions['future_predictions']))]
+            
+            # Per-step prediction interval around the forecast path
+            if 'forecast_lower' in predictions and 'forecast_upper' in predictions:
+                fig.add_trace(
+                    go.Scatter(
+                        x=future_dates + future_dates[::-1],
+                        y=list(predictions['forecast_upper']) + list(predictions['forecast_lower'])[::-1],
+                        fill='toself',
+                        fillcolor='rgba(255, 204, 0, 0.1)',
+                        line=dict(width=0),
+                        name='Forecast Interval',
+                        hoverinfo='skip'
+                    )
+                )
+            
             fig.add_trace(
                 go.Scatter(
                     x=future_dates,
                     y=predictions['future_predictions'],
                     mode='lines+markers',
-                    name='7-Day Forecast',
+                    name=f"{len(future_dates)}-Day Forecast",
                     line=dict(color=self.colors['prediction'], width=2, dash='dash'),
                     marker=dict(size=6),
                     hovertemplate='<b>%{x}</b><br>Predicted Price: $%{y:.2f}<extra></extra>'
@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+from cache import LRUCache
+
+INPUT_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+BASE_FEATURES = [
+    'high_low_ratio', 'close_open_ratio', 'range_ratio', 'volume_price_ratio',
+    'price_change', 'volume_change', 'close_lag_1', 'volume_lag_1'
+]
+ROLLING_FEATURES = ['ma_short', 'close_to_ma', 'volatility', 'volume_ma', 'volume_ratio']
+SMALL_DATA_FEATURES = ['position', 'position_normalized', 'trend_2', 'trend_3']
+
+# A feature row reads at most this many earlier bars (diff(3), 3-bar windows)
+LOOKBACK = 3
+
+
+def _lag(values, k):
+    """values shifted down by k rows, NaN-padded (like Series.shift(k))"""
+    lagged = np.empty_like(values)
+    lagged[:k] = np.nan
+    lagged[k:] = values[:len(values) - k]
+    return lagged
+
+
+def _fill(raw):
+    """Column-wise ffill().bfill() of a 2-D array"""
+    n_rows = raw.shape[0]
+    valid = ~np.isnan(raw)
+    if valid.all():
+        return raw.copy()
+
+    # Forward fill: take each cell from the last valid row at or above it
+    last_valid = np.where(valid, np.arange(n_rows)[:, None], -1)
+    np.maximum.accumulate(last_valid, axis=0, out=last_valid)
+    filled = np.take_along_axis(raw, np.maximum(last_valid, 0), axis=0)
+
+    # Back fill: only the leading gap is left, it takes the first valid value
+    first_valid = valid.argmax(axis=0)
+    leading = last_valid < 0
+    filled[leading] = np.broadcast_to(raw[first_valid, np.arange(raw.shape[1])], raw.shape)[leading]
+    return filled
+
+
+class FeatureBuilder:
+    def __init__(self):
+        # Per-key raw feature rows and the input bars they were computed from
+        self.states = LRUCache(ttl=None, max_entries=128, max_bytes=64 * 1024 * 1024)
+
+    def feature_names(self, n_rows):
+        """Feature columns for a frame of n_rows bars (small frames get extra features)"""
+        names = list(BASE_FEATURES)
+        if n_rows >= 5:
+            names += ROLLING_FEATURES
+        if n_rows < 10:
+            names += SMALL_DATA_FEATURES
+        return names
+
+    def _compute_rows(self, out, inputs, start, stop):
+        """Write raw (unfilled) feature rows [start, stop) of the full frame into out"""
+        n_rows = len(inputs['close'])
+        # Work on a segment that also covers the rows the first output row looks back to
+        lead = min(start, LOOKBACK)
+        seg = slice(start - lead, stop)
+        o, h, l, c, v = (inputs[col][seg] for col in INPUT_COLUMNS)
+        rows = slice(lead, None)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            close_lag, volume_lag = _lag(c, 1), _lag(v, 1)
+            columns = [
+                h / l,
+                c / o,
+                (h - l) / c,
+                v / c,
+                c / close_lag - 1,
+                v / volume_lag - 1,
+                close_lag,
+                volume_lag
+            ]
+
+            if n_rows >= 5:
+                window = min(3, n_rows // 2)
+                close_window = [c] + [_lag(c, k) for k in range(1, window)]
+                volume_window = [v] + [_lag(v, k) for k in range(1, window)]
+                ma_short = sum(close_window) / window
+                volatility = np.sqrt(sum((x - ma_short) ** 2 for x in close_window) / (window - 1))
+                volume_ma = sum(volume_window) / window
+                columns += [ma_short, c / ma_short, volatility, volume_ma, v / volume_ma]
+
+            if n_rows < 10:
+                position = np.arange(start - lead, stop, dtype=float)
+                columns += [position, position / n_rows, c - _lag(c, 2), c - _lag(c, 3)]
+
+        for i, column in enumerate(columns):
+            out[start:stop, i] = column[rows]
+
+    def _reusable_rows(self, state, index, inputs):
+        """Range [lo, hi) of new rows whose raw features match the cached state, and their offset"""
+        old_index = state['index']
+        if len(old_index) < 10 or len(index) < 10:
+            return None
+
+        # The new frame must start inside the cached one (same bars, maybe a later front)
+        offset = old_index.searchsorted(index[0])
+        if offset >= len(old_index) or old_index[offset] != index[0]:
+            return None
+        overlap = min(len(old_index) - offset, len(index))
+        if not old_index[offset:offset + overlap].equals(index[:overlap]):
+            return None
+
+        # Stop reusing at the first bar whose values changed (e.g. a revised last bar)
+        old_values = state['inputs'][offset:offset + overlap]
+        new_values = inputs[:overlap]
+        same = ((old_values == new_values) | (np.isnan(old_values) & np.isnan(new_values))).all(axis=1)
+        hi = overlap if same.all() else int(same.argmin())
+
+        # When the front moved, the first rows lost their lookback bars
+        lo = 0 if offset == 0 else LOOKBACK
+        return (lo, hi, offset) if lo < hi else None
+
+    def _refill(self, raw, old_matrix, lo, hi, offset):
+        """ffill/bfill raw, copying the filled rows [lo, hi) that can't have changed"""
+        # Filled row t only depends on the rows back to each column's last valid
+        # value, so once every column has a valid value inside the reused range
+        # the cached filled rows apply as-is
+        valid = ~np.isnan(raw[lo:hi])
+        if not valid.any(axis=0).all():
+            return _fill(raw)
+        first_clean = lo + int(valid.argmax(axis=0).max()) + 1
+
+        matrix = np.empty_like(raw)
+        matrix[:first_clean] = _fill(raw[:first_clean])
+        matrix[first_clean:hi] = old_matrix[offset + first_clean:offset + hi]
+        if hi < len(raw):
+            # New rows forward-fill from the last reused row
+            matrix[hi - 1:] = _fill(np.vstack([matrix[hi - 1], raw[hi:]]))
+        return matrix
+
+    def build(self, data, key=None):
+        """Return (features, target) frames for next-close prediction, or (None, None)"""
+        if data.empty or len(data) < 3:
+            return None, None
+        if not all(col in data.columns for col in INPUT_COLUMNS):
+            return None, None
+
+        # Float views of the input columns; no defensive copy of the frame
+        index = data.index
+        inputs = {col: data[col].to_numpy(dtype=float) for col in INPUT_COLUMNS}
+        stacked = np.column_stack([inputs[col] for col in INPUT_COLUMNS])
+        n_rows = len(index)
+        names = self.feature_names(n_rows)
+
+        state = self.states.get(key) if key is not None else None
+        reuse = self._reusable_rows(state, index, stacked) if state is not None else None
+
+        raw = np.empty((n_rows, len(names)))
+        if reuse is None:
+            self._compute_rows(raw, inputs, 0, n_rows)
+            matrix = _fill(raw)
+        else:
+            lo, hi, offset = reuse
+            raw[lo:hi] = state['raw'][offset + lo:offset + hi]
+            if lo > 0:
+                self._compute_rows(raw, inputs, 0, lo)
+            if hi < n_rows:
+                self._compute_rows(raw, inputs, hi, n_rows)
+            matrix = self._refill(raw, state['matrix'], lo, hi, offset)
+
+        matrix.flags.writeable = False
+        if key is not None:
+            self.states.set(key, {'index': index, 'inputs': stacked, 'raw': raw, 'matrix': matrix})
+
+        # Target: next day's closing price; the last row has none
+        target = inputs['close'][1:]
+        keep = ~np.isnan(target)
+        if keep.all():
+            values, target_index = matrix[:-1], index[:-1]
+        else:
+            values, target_index, target = matrix[:-1][keep], index[:-1][keep], target[keep]
+
+        # A column that was entirely NaN can't be filled; the old dropna() left no rows then
+        if len(values) < 1 or np.isnan(values[0]).any():
+            return None, None
+
+        features = pd.DataFrame(values, index=target_index, columns=names, copy=False)
+        return features, pd.Series(target, index=target_index, name='close')
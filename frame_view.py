@@ -0,0 +1,54 @@
+import pandas as pd
+
+
+# Read-only column view over frames sharing one index, joined without copying
+class JoinedFrame:
+    def __init__(self, *frames):
+        self.frames = [frame for frame in frames if frame is not None]
+        self.index = self.frames[0].index if self.frames else pd.Index([])
+
+        # Later frames win on duplicate column names, like reassigning a column
+        self._owner = {}
+        for frame in self.frames:
+            for col in frame.columns:
+                self._owner[col] = frame
+
+    @property
+    def columns(self):
+        return pd.Index(list(self._owner))
+
+    @property
+    def empty(self):
+        return len(self.index) == 0 or not self._owner
+
+    @property
+    def attrs(self):
+        return self.frames[0].attrs if self.frames else {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, col):
+        return col in self._owner
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._owner[key][key]
+        return self.to_frame(list(key))
+
+    def get(self, col, default=None):
+        return self[col] if col in self._owner else default
+
+    def copy(self):
+        """Copy of each block (still joined lazily)"""
+        return JoinedFrame(*[frame.copy() for frame in self.frames])
+
+    def tail(self, n=5):
+        """Materialize only the last n rows"""
+        return JoinedFrame(*[frame.tail(n) for frame in self.frames]).to_frame()
+
+    def to_frame(self, columns=None):
+        """Materialize the selected (default: all) columns as one DataFrame"""
+        columns = list(self._owner) if columns is None else columns
+        return pd.DataFrame({col: self[col] for col in columns}, index=self.index)
+
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+
+
+class Holdings:
+    def __init__(self):
+        # One entry per lot, stored column-wise; symbols are integer codes into self.symbols
+        self.symbols = []
+        self._codes = {}
+        self.lot_symbol = np.empty(0, dtype=np.int64)
+        self.lot_quantity = np.empty(0)
+        self.lot_cost = np.empty(0)    # cost per share; NaN when unknown
+
+    @classmethod
+    def from_lots(cls, symbols, quantities, costs=None):
+        """Build from parallel lot arrays (costs per share, optional)"""
+        holdings = cls()
+        holdings.add_lots(symbols, quantities, costs)
+        return holdings
+
+    @classmethod
+    def from_symbols(cls, symbols, quantity=1):
+        """One lot of `quantity` shares per symbol with unknown cost basis"""
+        symbols = list(symbols)
+        return cls.from_lots(symbols, np.full(len(symbols), float(quantity)))
+
+    def add_lots(self, symbols, quantities, costs=None):
+        """Append lots; negative quantities are short positions"""
+        symbols = np.asarray(symbols, dtype=object)
+        quantities = np.asarray(quantities, dtype=float)
+        costs = np.full(len(symbols), np.nan) if costs is None else np.asarray(costs, dtype=float)
+
+        # Assign codes to new symbols, keeping first-seen order
+        for symbol in pd.unique(symbols):
+            if symbol not in self._codes:
+                self._codes[symbol] = len(self.symbols)
+                self.symbols.append(symbol)
+        codes = pd.Series(symbols).map(self._codes).to_numpy(dtype=np.int64)
+
+        self.lot_symbol = np.concatenate([self.lot_symbol, codes])
+        self.lot_quantity = np.concatenate([self.lot_quantity, quantities])
+        self.lot_cost = np.concatenate([self.lot_cost, costs])
+        return self
+
+    def add_lot(self, symbol, quantity, cost=None):
+        return self.add_lots([symbol], [quantity], None if cost is None else [cost])
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def positions(self):
+        """Per-symbol (quantity, total cost, known-cost quantity) aggregated over lots"""
+        n = len(self.symbols)
+        known = ~np.isnan(self.lot_cost)
+        quantity = np.bincount(self.lot_symbol, weights=self.lot_quantity, minlength=n)
+        cost = np.bincount(
+            self.lot_symbol[known], weights=self.lot_quantity[known] * self.lot_cost[known], minlength=n
+        )
+        known_quantity = np.bincount(self.lot_symbol[known], weights=self.lot_quantity[known], minlength=n)
+        return quantity, cost, known_quantity
+
+    def analyze(self, prices, changes=None, target_weights=None, tolerance=0.0):
+        """P&L, weights, exposure, drift and rebalancing trades for every position in one pass"""
+        # prices / changes / target_weights: dicts or Series keyed by symbol
+        symbols = pd.Index(self.symbols, name='symbol')
+        price = pd.Series(prices, dtype=float).reindex(symbols).to_numpy()
+        change = (
+            pd.Series(changes, dtype=float).reindex(symbols).fillna(0).to_numpy()
+            if changes is not None else np.zeros(len(symbols))
+        )
+        quantity, cost, known_quantity = self.positions()
+
+        market_value = quantity * price
+        net_value = np.nansum(market_value)
+        gross_value = np.nansum(np.abs(market_value))
+
+        # Unrealized P&L only over the shares whose cost basis is known
+        cost_basis = np.where(known_quantity != 0, cost, np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            average_cost = cost / known_quantity
+            unrealized_pnl = known_quantity * price - cost_basis
+            pnl_percent = unrealized_pnl / np.abs(cost_basis) * 100
+            weight = market_value / net_value if net_value else np.full(len(symbols), np.nan)
+            exposure = np.abs(market_value) / gross_value if gross_value else np.full(len(symbols), np.nan)
+
+        # Drift from target weights (equal weight by default) and the trades that close it
+        if target_weights is None:
+            target = np.full(len(symbols), 1.0 / len(symbols)) if len(symbols) else np.empty(0)
+        else:
+            target = pd.Series(target_weights, dtype=float).reindex(symbols).fillna(0).to_numpy()
+        drift = weight - target
+        trade_value = np.where(np.abs(drift) > tolerance, (target - weight) * net_value, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            trade_shares = np.where(price > 0, np.fix(trade_value / price), 0.0)
+
+        return pd.DataFrame({
+            'quantity': quantity,
+            'price': price,
+            'average_cost': average_cost,
+            'market_value': market_value,
+            'cost_basis': cost_basis,
+            'unrealized_pnl': unrealized_pnl,
+            'pnl_percent': pnl_percent,
+            'day_change': quantity * change,
+            'weight': weight,
+            'exposure': exposure,
+            'target_weight': target,
+            'drift': drift,
+            'trade_shares': trade_shares,
+            'trade_value': trade_shares * price
+        }, index=symbols)
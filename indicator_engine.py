@@ -0,0 +1,305 @@
+import math
+import copy
+from collections import deque
+import pandas as pd
+
+NAN = float('nan')
+
+# Same columns, in the same order, as TechnicalIndicators.calculate_indicators
+INDICATOR_COLUMNS = [
+    'ma_5', 'ma_10', 'ma_20', 'ma_50',
+    'ema_12', 'ema_26',
+    'macd', 'macd_signal', 'macd_histogram',
+    'bb_middle', 'bb_upper', 'bb_lower',
+    'rsi',
+    'stoch_k', 'stoch_d',
+    'volume_ma', 'volume_ratio',
+    'momentum',
+    'volatility',
+    'atr',
+    'williams_r',
+    'cci'
+]
+
+
+def _divide(a, b):
+    """Float division with NumPy semantics (x/0 -> +-inf, 0/0 -> nan)"""
+    if b == 0:
+        if a == 0 or math.isnan(a):
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class RollingWindow:
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.nan_count = 0
+        self._since_resum = 0
+
+    def push(self, x):
+        if len(self.values) == self.window:
+            old = self.values[0]
+            if math.isnan(old):
+                self.nan_count -= 1
+            else:
+                self.total -= old
+                self.total_sq -= old * old
+        self.values.append(x)
+        if math.isnan(x):
+            self.nan_count += 1
+        else:
+            self.total += x
+            self.total_sq += x * x
+
+        # Recompute the sums once per window cycle so rounding error can't accumulate
+        self._since_resum += 1
+        if self._since_resum >= self.window:
+            finite = [v for v in self.values if not math.isnan(v)]
+            self.total = math.fsum(finite)
+            self.total_sq = math.fsum(v * v for v in finite)
+            self._since_resum = 0
+
+    @property
+    def ready(self):
+        return len(self.values) == self.window and self.nan_count == 0
+
+    def mean(self):
+        if not self.ready:
+            return NAN
+        return self.total / self.window
+
+    def std(self):
+        """Sample standard deviation (ddof=1), like pandas rolling().std()"""
+        if not self.ready or self.window < 2:
+            return NAN
+        var = (self.total_sq - self.total * self.total / self.window) / (self.window - 1)
+        return math.sqrt(max(var, 0.0))
+
+    def mean_abs_deviation(self):
+        if not self.ready:
+            return NAN
+        mean = self.total / self.window
+        return math.fsum(abs(v - mean) for v in self.values) / self.window
+
+
+class RollingExtreme:
+    def __init__(self, window, mode='max'):
+        self.window = window
+        self.better = (lambda a, b: a >= b) if mode == 'max' else (lambda a, b: a <= b)
+        self.candidates = deque()  # (position, value), monotonic in value
+        self.nans = deque()        # positions of NaN inputs still in the window
+        self.position = 0
+
+    def push(self, x):
+        pos = self.position
+        self.position += 1
+
+        while self.candidates and self.candidates[0][0] <= pos - self.window:
+            self.candidates.popleft()
+        while self.nans and self.nans[0] <= pos - self.window:
+            self.nans.popleft()
+
+        if math.isnan(x):
+            self.nans.append(pos)
+            return
+
+        while self.candidates and self.better(x, self.candidates[-1][1]):
+            self.candidates.pop()
+        self.candidates.append((pos, x))
+
+    def value(self):
+        if self.position < self.window or self.nans or not self.candidates:
+            return NAN
+        return self.candidates[0][1]
+
+
+class EWMean:
+    def __init__(self, span):
+        # Matches pandas ewm(span=...).mean() with adjust=True
+        self.decay = 1 - 2.0 / (span + 1)
+        self.numerator = 0.0
+        self.denominator = 0.0
+
+    def push(self, x):
+        self.numerator *= self.decay
+        self.denominator *= self.decay
+        if not math.isnan(x):
+            self.numerator += x
+            self.denominator += 1.0
+        return self.value()
+
+    def value(self):
+        if self.denominator == 0:
+            return NAN
+        return self.numerator / self.denominator
+
+
+class IncrementalIndicatorEngine:
+    def __init__(self):
+        self.index = []
+        self.rows = {col: [] for col in INDICATOR_COLUMNS}
+        self._state = self._initial_state()
+        self._previous_state = None
+        self._last_bar = None
+        self._frame = None
+        self.index_name = None
+
+    def _initial_state(self):
+        return {
+            'close_windows': {n: RollingWindow(n) for n in (5, 10, 20, 50)},
+            'ema_12': EWMean(12),
+            'ema_26': EWMean(26),
+            'macd_signal': EWMean(9),
+            'gain': RollingWindow(14),
+            'loss': RollingWindow(14),
+            'stoch_low': RollingExtreme(14, 'min'),
+            'stoch_high': RollingExtreme(14, 'max'),
+            'stoch_k': RollingWindow(3),
+            'volume': RollingWindow(10),
+            'closes': deque(maxlen=11),
+            'true_range': RollingWindow(14),
+            'typical_price': RollingWindow(20),
+        }
+
+    @property
+    def last_index(self):
+        return self.index[-1] if self.index else None
+
+    def __len__(self):
+        return len(self.index)
+
+    def update(self, timestamp, high, low, close, volume, replace_last=False):
+        """Feed one bar in O(1); replace_last revises the latest (partial) bar instead"""
+        if replace_last and self._previous_state is not None:
+            self._state = self._previous_state
+            self.index.pop()
+            for col in INDICATOR_COLUMNS:
+                self.rows[col].pop()
+
+        # Keep the state before this bar so it can be revised in place later
+        self._previous_state = copy.deepcopy(self._state)
+        return self._append(timestamp, high, low, close, volume)
+
+    def _append(self, timestamp, high, low, close, volume):
+        row = self._step(float(high), float(low), float(close), float(volume))
+
+        self.index.append(timestamp)
+        for col in INDICATOR_COLUMNS:
+            self.rows[col].append(row[col])
+        self._last_bar = (timestamp, float(high), float(low), float(close), float(volume))
+        self._frame = None
+        return row
+
+    def extend(self, data):
+        """Feed all bars of an OHLCV frame, oldest first"""
+        highs = data['high'].to_numpy(dtype=float)
+        lows = data['low'].to_numpy(dtype=float)
+        closes = data['close'].to_numpy(dtype=float)
+        volumes = data['volume'].to_numpy(dtype=float)
+        self.index_name = data.index.name
+
+        # Only the last bar can be revised later, so only it needs a state snapshot
+        last = len(data) - 1
+        for i, timestamp in enumerate(data.index):
+            if i == last:
+                self.update(timestamp, highs[i], lows[i], closes[i], volumes[i])
+            else:
+                self._append(timestamp, highs[i], lows[i], closes[i], volumes[i])
+
+    def sync(self, data):
+        """Feed only the new (or revised last) bars of a frame; False if it needs a rebuild"""
+        if not self.index:
+            self.extend(data)
+            return True
+
+        # Anything but a continuation of the bars already seen needs a rebuild
+        if len(data) < len(self.index) or data.index[0] != self.index[0]:
+            return False
+        if data.index[len(self.index) - 1] != self.last_index:
+            return False
+
+        last = data.iloc[len(self.index) - 1]
+        bar = (self.last_index, float(last['high']), float(last['low']),
+               float(last['close']), float(last['volume']))
+        if bar != self._last_bar:
+            self.update(*bar, replace_last=True)
+
+        if len(data) > len(self.index):
+            self.extend(data.iloc[len(self.index):])
+        return True
+
+    def to_frame(self):
+        """Get all indicator rows as a DataFrame matching the batch calculation"""
+        if self._frame is None:
+            self._frame = pd.DataFrame(self.rows, index=pd.Index(self.index, name=self.index_name))
+        return self._frame
+
+    def _step(self, high, low, close, volume):
+        state = self._state
+        closes = state['closes']
+        prev_close = closes[-1] if closes else NAN
+        row = {}
+
+        # Moving averages and Bollinger Bands
+        for n, window in state['close_windows'].items():
+            window.push(close)
+            row[f'ma_{n}'] = window.mean()
+
+        row['ema_12'] = state['ema_12'].push(close)
+        row['ema_26'] = state['ema_26'].push(close)
+        row['macd'] = row['ema_12'] - row['ema_26']
+        row['macd_signal'] = state['macd_signal'].push(row['macd'])
+        row['macd_histogram'] = row['macd'] - row['macd_signal']
+
+        std_20 = state['close_windows'][20].std()
+        row['bb_middle'] = row['ma_20']
+        row['bb_upper'] = row['bb_middle'] + std_20 * 2
+        row['bb_lower'] = row['bb_middle'] - std_20 * 2
+
+        # RSI (the first bar's missing change counts as zero gain and loss)
+        delta = close - prev_close
+        state['gain'].push(delta if delta > 0 else 0.0)
+        state['loss'].push(-delta if delta < 0 else 0.0)
+        rs = _divide(state['gain'].mean(), state['loss'].mean())
+        row['rsi'] = 100 - _divide(100, 1 + rs)
+
+        # Stochastic Oscillator and Williams %R share the 14-bar extremes
+        state['stoch_low'].push(low)
+        state['stoch_high'].push(high)
+        lowest_low = state['stoch_low'].value()
+        highest_high = state['stoch_high'].value()
+        row['stoch_k'] = 100 * _divide(close - lowest_low, highest_high - lowest_low)
+        state['stoch_k'].push(row['stoch_k'])
+        row['stoch_d'] = state['stoch_k'].mean()
+
+        # Volume indicators
+        state['volume'].push(volume)
+        row['volume_ma'] = state['volume'].mean()
+        row['volume_ratio'] = _divide(volume, row['volume_ma'])
+
+        # Price momentum over 10 bars
+        closes.append(close)
+        row['momentum'] = _divide(close, closes[0]) - 1 if len(closes) == 11 else NAN
+
+        row['volatility'] = std_20
+
+        # Average True Range
+        ranges = [r for r in (high - low, abs(high - prev_close), abs(low - prev_close))
+                  if not math.isnan(r)]
+        state['true_range'].push(max(ranges) if ranges else NAN)
+        row['atr'] = state['true_range'].mean()
+
+        row['williams_r'] = -100 * _divide(highest_high - close, highest_high - lowest_low)
+
+        # Commodity Channel Index
+        typical_price = (high + low + close) / 3
+        state['typical_price'].push(typical_price)
+        sma = state['typical_price'].mean()
+        mean_deviation = state['typical_price'].mean_abs_deviation()
+        row['cci'] = _divide(typical_price - sma, 0.015 * mean_deviation)
+
+        return row
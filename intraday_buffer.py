@@ -0,0 +1,93 @@
+import threading
+import numpy as np
+import pandas as pd
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+class IntradayRingBuffer:
+    def __init__(self, capacity=500):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype='i8')
+        self.columns = {
+            'open': np.zeros(capacity, dtype='f8'),
+            'high': np.zeros(capacity, dtype='f8'),
+            'low': np.zeros(capacity, dtype='f8'),
+            'close': np.zeros(capacity, dtype='f8'),
+            'volume': np.zeros(capacity, dtype='i8')
+        }
+        self.start = 0   # slot of the oldest bar
+        self.size = 0
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def _slot(self, i):
+        """Physical slot of the i-th bar in chronological order"""
+        return (self.start + i) % self.capacity
+
+    @property
+    def last_timestamp(self):
+        """Timestamp of the newest bar, or None if empty"""
+        if self.size == 0:
+            return None
+        return pd.Timestamp(self.timestamps[self._slot(self.size - 1)])
+
+    def update(self, df):
+        """Merge bars into the buffer and return the bars that were appended or changed"""
+        with self._lock:
+            ts = df.index.values.astype('datetime64[ns]').astype('i8')
+            last = self.timestamps[self._slot(self.size - 1)] if self.size else None
+
+            # Bars older than the newest stored bar are already known
+            if last is not None:
+                keep = ts >= last
+                df, ts = df[keep], ts[keep]
+
+            if len(df) == 0:
+                return df
+
+            values = {col: df[col].values for col in PRICE_COLUMNS}
+            changed = np.ones(len(df), dtype=bool)
+
+            # Replace the partial last bar in place
+            if last is not None and ts[0] == last:
+                slot = self._slot(self.size - 1)
+                changed[0] = any(
+                    self.columns[col][slot] != values[col][0] for col in PRICE_COLUMNS
+                )
+                for col in PRICE_COLUMNS:
+                    self.columns[col][slot] = values[col][0]
+                ts = ts[1:]
+                values = {col: v[1:] for col, v in values.items()}
+
+            # Newer bars are appended, overwriting the oldest once the buffer is full;
+            # only the newest `capacity` bars can survive an oversized append
+            n_new = len(ts)
+            if n_new > self.capacity:
+                ts = ts[-self.capacity:]
+                values = {col: v[-self.capacity:] for col, v in values.items()}
+                n_new = self.capacity
+
+            if n_new:
+                overflow = max(0, self.size + n_new - self.capacity)
+                self.start = (self.start + overflow) % self.capacity
+                self.size -= overflow
+                slots = (self.start + self.size + np.arange(n_new)) % self.capacity
+                self.timestamps[slots] = ts
+                for col in PRICE_COLUMNS:
+                    self.columns[col][slots] = values[col]
+                self.size += n_new
+
+            delta = df[changed]
+            if len(delta):
+                self.version += 1
+            return delta
+
+    def to_frame(self):
+        """Get the buffered bars as a chronological OHLCV DataFrame"""
+        with self._lock:
+            slots = (self.start + np.arange(self.size)) % self.capacity
+            return pd.DataFrame(
+                {col: self.columns[col][slots] for col in PRICE_COLUMNS},
+                index=pd.DatetimeIndex(self.timestamps[slots].astype('datetime64[ns]'), name='date')
+            )
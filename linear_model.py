@@ -0,0 +1,109 @@
+import numpy as np
+
+
+class RunningLinearModel:
+    def __init__(self, n_features):
+        # Sufficient statistics of the training rows: n, sums, X'X, X'y
+        self.n_features = n_features
+        self.n = 0
+        self.sum_x = np.zeros(n_features)
+        self.sum_y = 0.0
+        self.xtx = np.zeros((n_features, n_features))
+        self.xty = np.zeros(n_features)
+
+        # Fitted parameters (on standardized features, like StandardScaler + LinearRegression)
+        self.mean_ = np.zeros(n_features)
+        self.scale_ = np.ones(n_features)
+        self.coef_ = np.zeros(n_features)
+        self.intercept_ = 0.0
+
+    def add(self, X, y, sign=1.0):
+        """Fold rows into the statistics (sign=-1 removes previously added rows)"""
+        X = np.asarray(X, dtype=float).reshape(-1, self.n_features)
+        y = np.asarray(y, dtype=float).ravel()
+        self.n += int(sign) * len(y)
+        self.sum_x += sign * X.sum(axis=0)
+        self.sum_y += sign * y.sum()
+        self.xtx += sign * (X.T @ X)
+        self.xty += sign * (X.T @ y)
+        return self
+
+    def remove(self, X, y):
+        return self.add(X, y, sign=-1.0)
+
+    def solve(self):
+        """Fit from the current statistics; returns False if there are no rows"""
+        if self.n <= 0:
+            return False
+
+        n = float(self.n)
+        self.mean_ = self.sum_x / n
+        y_mean = self.sum_y / n
+
+        # Population variance, with StandardScaler's handling of constant features
+        cov = self.xtx / n - np.outer(self.mean_, self.mean_)
+        var = np.clip(np.diag(cov), 0.0, None)
+        self.scale_ = np.where(var > 1e-12 * np.maximum(self.mean_ ** 2, 1.0), np.sqrt(var), 1.0)
+
+        cov_xy = self.xty / n - self.mean_ * y_mean
+        scaled_cov = cov / np.outer(self.scale_, self.scale_)
+        scaled_cov_xy = cov_xy / self.scale_
+
+        # Minimum-norm least squares, matching LinearRegression on rank-deficient data
+        self.coef_ = np.linalg.lstsq(scaled_cov, scaled_cov_xy, rcond=None)[0]
+        self.intercept_ = y_mean
+        return True
+
+    def transform(self, X):
+        """Standardize raw features with the fitted mean and scale"""
+        return (np.asarray(X, dtype=float) - self.mean_) / self.scale_
+
+    def predict(self, X):
+        return self.transform(X) @ self.coef_ + self.intercept_
+
+
+def walk_forward_predict(X, y, start, window=None):
+    """Out-of-sample prediction for each row t >= start, fitted on the rows before t"""
+    # window=None refits on an expanding window, otherwise on the last `window`
+    # rows. Every refit comes from prefix sums of the normal-equation statistics
+    # and all of them are solved in one batched pseudo-inverse
+    X = np.asarray(X, dtype=float)
+    y = np.asarray(y, dtype=float).ravel()
+    n_rows, n_features = X.shape
+    if start < 1 or start >= n_rows:
+        return np.empty(0)
+
+    # Standardize once so the prefix sums stay well conditioned; the per-window
+    # re-standardization below makes the fit invariant to this transform
+    center = X.mean(axis=0)
+    spread = X.std(axis=0)
+    spread[spread == 0] = 1.0
+    Z = (X - center) / spread
+
+    # Prefix sums with a leading zero row: stats over rows [a, b) = cum[b] - cum[a]
+    cum_n = np.arange(n_rows + 1, dtype=float)
+    cum_x = np.vstack([np.zeros(n_features), np.cumsum(Z, axis=0)])
+    cum_y = np.concatenate([[0.0], np.cumsum(y)])
+    cum_xtx = np.concatenate([
+        np.zeros((1, n_features, n_features)), np.cumsum(Z[:, :, None] * Z[:, None, :], axis=0)
+    ])
+    cum_xty = np.vstack([np.zeros(n_features), np.cumsum(Z * y[:, None], axis=0)])
+
+    ends = np.arange(start, n_rows)
+    begins = np.zeros_like(ends) if window is None else np.maximum(ends - window, 0)
+
+    n = cum_n[ends] - cum_n[begins]
+    mean = (cum_x[ends] - cum_x[begins]) / n[:, None]
+    y_mean = (cum_y[ends] - cum_y[begins]) / n
+    cov = (cum_xtx[ends] - cum_xtx[begins]) / n[:, None, None] - mean[:, :, None] * mean[:, None, :]
+    cov_xy = (cum_xty[ends] - cum_xty[begins]) / n[:, None] - mean * y_mean[:, None]
+
+    # Same scaling and minimum-norm solution as RunningLinearModel.solve
+    var = np.clip(np.einsum('tii->ti', cov), 0.0, None)
+    scale = np.where(var > 1e-12 * np.maximum(mean ** 2, 1.0), np.sqrt(var), 1.0)
+    scaled_cov = cov / (scale[:, :, None] * scale[:, None, :])
+    scaled_cov_xy = cov_xy / scale
+    rcond = np.finfo(float).eps * n_features
+    coef = np.einsum('tij,tj->ti', np.linalg.pinv(scaled_cov, rcond=rcond), scaled_cov_xy)
+
+    return np.einsum('ti,ti->t', (Z[ends] - mean) / scale, coef) + y_mean
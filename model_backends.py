@@ -0,0 +1,91 @@
+import threading
+from collections import namedtuple
+import numpy as np
+from sklearn.ensemble import GradientBoostingRegressor, VotingRegressor
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+
+class FittedEstimator(namedtuple('FittedEstimator', [
+    'feature_names', 'backend', 'estimator', 'train_score', 'test_score', 'mse'
+])):
+    """Fitted scikit-learn backend; never refitted after creation, so safe to share"""
+
+    def predict(self, X):
+        return self.estimator.predict(np.asarray(X, dtype=float))
+
+    @property
+    def importances(self):
+        """Absolute per-feature weights, or None if the estimator has no notion of them"""
+        model = self.estimator.steps[-1][1] if hasattr(self.estimator, 'steps') else self.estimator
+        if hasattr(model, 'feature_importances_'):
+            return np.asarray(model.feature_importances_)
+        if hasattr(model, 'coef_'):
+            return np.abs(np.ravel(model.coef_))
+        return None
+
+
+class ModelBackend:
+    def __init__(self, name, factory, fit_cost_ms, predict_cost_ms):
+        self.name = name
+        self.factory = factory                  # returns an unfitted estimator; None = built-in linear model
+        self.fit_cost_ms = fit_cost_ms          # declared cost for ~1 year of daily bars
+        self.predict_cost_ms = predict_cost_ms
+
+        # Measured timings and the last holdout score
+        self._lock = threading.Lock()
+        self.fits = 0
+        self.fit_ms = 0.0
+        self.predictions = 0
+        self.predict_ms = 0.0
+        self.test_score = None
+
+    def record_fit(self, elapsed_ms, test_score):
+        with self._lock:
+            self.fits += 1
+            self.fit_ms += elapsed_ms
+            self.test_score = test_score
+
+    def record_predict(self, elapsed_ms):
+        with self._lock:
+            self.predictions += 1
+            self.predict_ms += elapsed_ms
+
+    def stats(self):
+        """Declared and measured costs, and holdout R² per millisecond of fit + predict"""
+        with self._lock:
+            avg_fit = self.fit_ms / self.fits if self.fits else None
+            avg_predict = self.predict_ms / self.predictions if self.predictions else None
+            total_ms = (avg_fit or 0) + (avg_predict or 0)
+            return {
+                'declared_fit_ms': self.fit_cost_ms,
+                'declared_predict_ms': self.predict_cost_ms,
+                'fits': self.fits,
+                'avg_fit_ms': avg_fit,
+                'predictions': self.predictions,
+                'avg_predict_ms': avg_predict,
+                'test_score': self.test_score,
+                'score_per_ms': self.test_score / total_ms if self.test_score is not None and total_ms else None
+            }
+
+
+def default_backends():
+    """Built-in backends, cheapest first"""
+    ridge = lambda: make_pipeline(StandardScaler(), Ridge(alpha=1.0))
+    boosting = lambda: GradientBoostingRegressor(n_estimators=200, max_depth=3, learning_rate=0.05, random_state=0)
+
+    return {
+        'linear': ModelBackend('linear', None, fit_cost_ms=2, predict_cost_ms=0.05),
+        'ridge': ModelBackend('ridge', ridge, fit_cost_ms=2, predict_cost_ms=0.5),
+        'gradient_boosting': ModelBackend('gradient_boosting', boosting, fit_cost_ms=200, predict_cost_ms=1),
+        'ensemble': ModelBackend(
+            'ensemble',
+            lambda: VotingRegressor([
+                ('linear', make_pipeline(StandardScaler(), LinearRegression())),
+                ('ridge', ridge()),
+                ('boosting', boosting())
+            ]),
+            fit_cost_ms=200, predict_cost_ms=2
+        )
+    }
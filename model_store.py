@@ -0,0 +1,98 @@
+import os
+import glob
+import hashlib
+import threading
+import joblib
+import numpy as np
+import pandas as pd
+
+# Bump when the artifact layout changes; older files are ignored and retrained
+ARTIFACT_VERSION = 1
+
+
+def feature_set_hash(feature_names):
+    """Short stable hash of the ordered feature columns a model was fitted on"""
+    return hashlib.sha1('|'.join(feature_names).encode()).hexdigest()[:12]
+
+
+class ModelStore:
+    def __init__(self, root_dir, max_artifacts=500):
+        self.root_dir = root_dir
+        self.max_artifacts = max_artifacts
+        self._lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+
+    def artifact_name(self, symbol, period, backend, feature_names, end_date):
+        """File stem keyed by symbol, period, backend, feature-set hash and data end date"""
+        end = pd.Timestamp(end_date).strftime('%Y%m%d%H%M')
+        return f"{symbol.upper()}_{period}_{backend}_{feature_set_hash(feature_names)}_{end}_v{ARTIFACT_VERSION}"
+
+    def _path(self, name, linear):
+        return os.path.join(self.root_dir, name + ('.npz' if linear else '.joblib'))
+
+    def save(self, name, fitted, data_version):
+        """Atomically write a fitted model; linear models as npz, others with joblib"""
+        linear = hasattr(fitted, 'coef')
+        path = self._path(name, linear)
+        # Unique temp name: batch worker processes share the directory
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+        with self._lock:
+            with open(tmp_path, 'wb') as f:
+                if linear:
+                    np.savez(
+                        f,
+                        feature_names=np.array(fitted.feature_names, dtype=str),
+                        mean=fitted.mean, scale=fitted.scale, coef=fitted.coef,
+                        scalars=np.array([fitted.intercept, fitted.train_score, fitted.test_score, fitted.mse]),
+                        data_version=np.array(str(data_version))
+                    )
+                else:
+                    joblib.dump({'data_version': str(data_version), 'model': fitted}, f)
+            os.replace(tmp_path, path)
+            self._prune()
+
+    def load(self, name, data_version, linear_cls):
+        """Load an artifact fitted on exactly this data, or None (linear_cls rebuilds npz models)"""
+        for linear in (True, False):
+            path = self._path(name, linear)
+            if not os.path.exists(path):
+                continue
+            try:
+                if linear:
+                    with np.load(path, allow_pickle=False) as npz:
+                        if str(npz['data_version']) != str(data_version):
+                            return None
+                        intercept, train_score, test_score, mse = npz['scalars']
+                        fitted = linear_cls(
+                            tuple(str(col) for col in npz['feature_names']),
+                            npz['mean'], npz['scale'], npz['coef'], float(intercept),
+                            float(train_score), float(test_score), float(mse)
+                        )
+                        for values in (fitted.mean, fitted.scale, fitted.coef):
+                            values.flags.writeable = False
+                else:
+                    payload = joblib.load(path)
+                    if payload['data_version'] != str(data_version):
+                        return None
+                    fitted = payload['model']
+            except Exception as e:
+                print(f"Error loading model artifact {name}: {str(e)}")
+                return None
+
+            # Refresh the modification time so pruning drops least recently used files
+            os.utime(path)
+            return fitted
+        return None
+
+    def _prune(self):
+        """Delete the least recently used artifacts beyond max_artifacts"""
+        paths = glob.glob(os.path.join(self.root_dir, '*.npz')) + glob.glob(os.path.join(self.root_dir, '*.joblib'))
+        if len(paths) <= self.max_artifacts:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_artifacts]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
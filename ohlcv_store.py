@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import threading
+from functools import lru_cache
+from datetime import datetime, timedelta, time as dtime
+import numpy as np
+import pandas as pd
+import pytz
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar, Holiday, GoodFriday, USMartinLutherKingJr, USPresidentsDay,
+    USMemorialDay, USLaborDay, USThanksgivingDay, nearest_workday, sunday_to_monday
+)
+
+# On-disk row layout: one structured record per daily bar
+BAR_DTYPE = np.dtype([
+    ('date', 'i8'),    # nanoseconds since epoch
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'i8')
+])
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# A session that still has no bar this long after its close never will
+# (an unscheduled closure); earlier, the bar may just not be published yet
+MISSING_BAR_GRACE = timedelta(hours=6)
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Scheduled full-day NYSE closures"""
+    rules = [
+        # A Saturday New Year's Day is not observed on the Friday before
+        Holiday('New Years Day', month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday('Juneteenth', month=6, day=19, start_date='2022-01-01', observance=nearest_workday),
+        Holiday('Independence Day', month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday('Christmas', month=12, day=25, observance=nearest_workday)
+    ]
+
+
+@lru_cache(maxsize=None)
+def _nyse_holidays(year):
+    return frozenset(NYSEHolidayCalendar().holidays(f'{year}-01-01', f'{year}-12-31').date)
+
+
+def is_trading_day(day):
+    """Check whether the NYSE has a regular session on a date"""
+    return day.weekday() < 5 and day not in _nyse_holidays(day.year)
+
+
+def latest_session_close(now=None):
+    """Return the most recent NYSE daily close (US/Eastern) that should have a bar"""
+    eastern = pytz.timezone('US/Eastern')
+    now = now.astimezone(eastern) if now is not None else datetime.now(eastern)
+    day = now.date()
+
+    # Before today's close the latest complete bar is the previous session
+    if now.time() < dtime(16):
+        day -= timedelta(days=1)
+
+    # Roll back over weekends and exchange holidays
+    while not is_trading_day(day):
+        day -= timedelta(days=1)
+
+    return eastern.localize(datetime.combine(day, dtime(16)))
+
+
+class OHLCVStore:
+    def __init__(self, root_dir):
+        self.root_dir = root_dir
+        self.index_path = os.path.join(root_dir, 'index.json')
+        self._lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        """Load the per-symbol metadata index"""
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        """Atomically persist the metadata index"""
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(tmp_path, self.index_path)
+
+    def _symbol_path(self, symbol):
+        return os.path.join(self.root_dir, f"{symbol.upper()}.npy")
+
+    def get_metadata(self, symbol):
+        """Get stored metadata (rows, first/last date, last check) for a symbol"""
+        return self.index.get(symbol.upper())
+
+    def last_date(self, symbol):
+        """Get the date of the newest stored bar, or None"""
+        meta = self.get_metadata(symbol)
+        if not meta or not meta.get('last_date'):
+            return None
+        return pd.Timestamp(meta['last_date'])
+
+    def is_fresh(self, symbol, now=None):
+        """Check whether the stored series already covers the latest session"""
+        meta = self.get_metadata(symbol)
+        if not meta:
+            return False
+
+        expected_close = latest_session_close(now)
+        expected_date = pd.Timestamp(expected_close.date())
+
+        # The latest bar only counts once it was written after its session closed;
+        # a bar fetched mid-session is partial and must be fetched again
+        if (meta.get('last_date') and pd.Timestamp(meta['last_date']) >= expected_date
+                and meta.get('updated_at', 0) >= expected_close.timestamp()):
+            return True
+
+        # Holidays are already skipped above; a bar still missing well after the
+        # close means an unscheduled closure, so stop asking until the next session
+        return meta.get('checked_at', 0) >= (expected_close + MISSING_BAR_GRACE).timestamp()
+
+    def load(self, symbol):
+        """Load the stored daily series for a symbol as a DataFrame, or None"""
+        path = self._symbol_path(symbol)
+        if not os.path.exists(path):
+            return None
+
+        try:
+            records = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+        if len(records) == 0:
+            return None
+
+        df = pd.DataFrame(
+            {col: np.asarray(records[col]) for col in PRICE_COLUMNS},
+            index=pd.DatetimeIndex(np.asarray(records['date']).astype('datetime64[ns]'), name='date')
+        )
+        return df
+
+    def append(self, symbol, df, now=None):
+        """Write bars from the last stored date on (replacing it) and return the number written"""
+        symbol = symbol.upper()
+
+        stamp = now.timestamp() if now is not None else time.time()
+
+        # Never persist the current session's partial bar
+        session_date = pd.Timestamp(latest_session_close(now).date())
+        df = df[df.index.normalize() <= session_date]
+
+        with self._lock:
+            last = self.last_date(symbol)
+            if last is not None:
+                # The stored last bar is re-written too, in case it was revised
+                df = df[df.index >= last]
+
+            meta = self.index.setdefault(symbol, {})
+            meta['checked_at'] = stamp
+
+            if df.empty:
+                self._save_index()
+                return 0
+
+            new_records = np.empty(len(df), dtype=BAR_DTYPE)
+            new_records['date'] = df.index.values.astype('datetime64[ns]').astype('i8')
+            for col in PRICE_COLUMNS:
+                new_records[col] = df[col].values
+
+            path = self._symbol_path(symbol)
+            if last is not None and os.path.exists(path):
+                records = np.load(path)
+                records = records[records['date'] < new_records['date'].min()]
+                records = np.concatenate([records, new_records])
+            else:
+                records = new_records
+            records.sort(order='date')
+
+            # Write to a temp file first so readers never see a partial series
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, records)
+            os.replace(tmp_path, path)
+
+            dates = records['date'].astype('datetime64[ns]')
+            meta.update({
+                'rows': int(len(records)),
+                'first_date': str(pd.Timestamp(dates[0]).date()),
+                'last_date': str(pd.Timestamp(dates[-1]).date()),
+                'updated_at': stamp
+            })
+            self._save_index()
+
+            return len(new_records)
@@ -2,72 +2,90 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import streamlit as st
+from holdings import Holdings
 
 class PortfolioManager:
     def __init__(self):
         self.portfolio_data = {}
     
+    def _performance_row(self, symbol, current_data):
+        """Performance row for one symbol's quote (zeros if the fetch failed)"""
+        if current_data:
+            return {
+                'symbol': symbol,
+                'current_price': current_data['price'],
+                'change': current_data['change'],
+                'change_percent': current_data['change_percent'],
+                'volume': current_data['volume']
+            }
+        
+        # Add placeholder data if fetch fails
+        return {
+            'symbol': symbol,
+            'current_price': 0,
+            'change': 0,
+            'change_percent': 0,
+            'volume': 0
+        }
+    
     def get_portfolio_performance(self, symbols, data_fetcher):
         """Get performance data for a list of symbols"""
-        performance_data = []
-        
-        for symbol in symbols:
-            try:
-                # Get current price data
-                current_data = data_fetcher.get_current_price(symbol)
-                
-                if current_data:
-                    performance_data.append({
-                        'symbol': symbol,
-                        'current_price': current_data['price'],
-                        'change': current_data['change'],
-                        'change_percent': current_data['change_percent'],
-                        'volume': current_data['volume']
-                    })
-                else:
-                    # Add placeholder data if fetch fails
-                    performance_data.append({
-                        'symbol': symbol,
-                        'current_price': 0,
-                        'change': 0,
-                        'change_percent': 0,
-                        'volume': 0
-                    })
-                    
-            except Exception as e:
-                st.error(f"Error fetching data for {symbol}: {str(e)}")
-                continue
-        
-        return performance_data
+        # Quotes are fetched concurrently; rows keep the portfolio order
+        quotes = data_fetcher.get_current_prices(symbols)
+        return [self._performance_row(symbol, quotes.get(symbol)) for symbol in symbols]
+    
+    def iter_portfolio_performance(self, symbols, data_fetcher):
+        """Start fetching every quote now; iterate to get each row as soon as its quote arrives"""
+        quotes = data_fetcher.iter_current_prices(symbols)
+        return (self._performance_row(symbol, current_data) for symbol, current_data in quotes)
+    
+    def _analyze(self, portfolio_data, holdings=None, target_weights=None, tolerance=0.0):
+        """Quote frame joined with the holdings analysis (one share per symbol by default)"""
+        df = pd.DataFrame(portfolio_data)
+        if holdings is None:
+            holdings = Holdings.from_symbols(df['symbol'])
+        quotes = df.set_index('symbol')
+        # Failed fetches come back as zero-price placeholders; price them as unknown
+        quoted = quotes['current_price'] > 0
+        analysis = holdings.analyze(
+            quotes['current_price'].where(quoted), quotes['change'].where(quoted), target_weights, tolerance
+        )
+        return df.join(analysis.drop(columns='price'), on='symbol')
     
-    def calculate_portfolio_metrics(self, portfolio_data):
+    def calculate_portfolio_metrics(self, portfolio_data, holdings=None):
         """Calculate portfolio-level metrics"""
         if not portfolio_data:
             return {}
         
         try:
-            df = pd.DataFrame(portfolio_data)
+            df = self._analyze(portfolio_data, holdings)
+            quoted = df[df['current_price'] > 0]
             
             # Calculate metrics
-            total_value = df['current_price'].sum()
-            total_change = df['change'].sum()
-            average_change_percent = df['change_percent'].mean()
+            total_value = df['market_value'].sum()
+            total_change = df['day_change'].sum()
+            average_change_percent = quoted['change_percent'].mean()
             
             # Calculate volatility (simplified)
-            volatility = df['change_percent'].std()
+            volatility = quoted['change_percent'].std()
             
             # Best and worst performers
-            best_performer = df.loc[df['change_percent'].idxmax()]
-            worst_performer = df.loc[df['change_percent'].idxmin()]
+            best_performer = quoted.loc[quoted['change_percent'].idxmax()].to_dict() if not quoted.empty else {}
+            worst_performer = quoted.loc[quoted['change_percent'].idxmin()].to_dict() if not quoted.empty else {}
             
             return {
                 'total_value': total_value,
                 'total_change': total_change,
                 'average_change_percent': average_change_percent,
                 'volatility': volatility,
-                'best_performer': best_performer.to_dict(),
-                'worst_performer': worst_performer.to_dict(),
-                'num_stocks': len(df)
+                'total_cost': df['cost_basis'].sum(),
+                'unrealized_pnl': df['unrealized_pnl'].sum(),
+                'gross_exposure': df['market_value'].abs().sum(),
+                'net_exposure': total_value,
+                'best_performer': best_performer,
+                'worst_performer': worst_performer,
+                'num_stocks': len(df),
+                'num_quoted': len(quoted)
             }
             
         except Exception as e:
@@ -82,8 +100,9 @@ class PortfolioManager:
         try:
             # Get historical data for correlation analysis
             historical_data = {}
+            batch = data_fetcher.get_historical_batch(symbols, '3M')
             for symbol in symbols:
-                data = data_fetcher.get_historical_data(symbol, '3M')
+                data = batch.get(symbol)
                 if data is not None and not data.empty:
                     historical_data[symbol] = data['close']
             
@@ -111,59 +130,45 @@ class PortfolioManager:
         except Exception as e:
             return {'diversification_score': 0, 'message': f'Error calculating diversification: {str(e)}'}
     
-    def suggest_rebalancing(self, portfolio_data):
-        """Suggest portfolio rebalancing based on simple rules"""
+    def suggest_rebalancing(self, portfolio_data, holdings=None, target_weights=None, tolerance=0.05):
+        """Suggest portfolio rebalancing based on simple rules and drift from target weights"""
         if not portfolio_data or len(portfolio_data) < 2:
             return {'suggestions': [], 'message': 'Need at least 2 stocks for rebalancing suggestions'}
         
         try:
-            df = pd.DataFrame(portfolio_data)
-            
-            # Calculate weights (assuming equal dollar amounts initially)
-            total_value = df['current_price'].sum()
-            df['weight'] = df['current_price'] / total_value
-            
-            suggestions = []
-            
-            # Check for overweight positions (>30% of portfolio)
-            overweight = df[df['weight'] > 0.3]
-            for _, stock in overweight.iterrows():
-                suggestions.append({
-                    'type': 'reduce',
-                    'symbol': stock['symbol'],
-                    'reason': f'Overweight position ({stock["weight"]:.1%})',
-                    'action': 'Consider reducing position'
-                })
-            
-            # Check for underweight positions (<5% of portfolio)
-            underweight = df[df['weight'] < 0.05]
-            for _, stock in underweight.iterrows():
-                suggestions.append({
-                    'type': 'increase',
-                    'symbol': stock['symbol'],
-                    'reason': f'Underweight position ({stock["weight"]:.1%})',
-                    'action': 'Consider increasing position'
+            df = self._analyze(portfolio_data, holdings, target_weights, tolerance)
+            
+            # Overweight (>30%), underweight (<5%) and poorly performing positions
+            rules = [
+                (df['weight'] > 0.3, 'reduce', 'Overweight position ({:.1%})', 'weight', 'Consider reducing position'),
+                (df['weight'] < 0.05, 'increase', 'Underweight position ({:.1%})', 'weight', 'Consider increasing position'),
+                (df['change_percent'] < -10, 'review', 'Poor performance ({:.1%})', 'change_percent', 'Review fundamentals')
+            ]
+            suggestions = pd.concat([
+                pd.DataFrame({
+                    'type': kind,
+                    'symbol': df.loc[mask, 'symbol'],
+                    'reason': df.loc[mask, column].map(reason.format),
+                    'action': action
                 })
+                for mask, kind, reason, column, action in rules
+            ]).to_dict('records')
             
-            # Check for poorly performing stocks
-            poor_performers = df[df['change_percent'] < -10]
-            for _, stock in poor_performers.iterrows():
-                suggestions.append({
-                    'type': 'review',
-                    'symbol': stock['symbol'],
-                    'reason': f'Poor performance ({stock["change_percent"]:.1%})',
-                    'action': 'Review fundamentals'
-                })
+            # Trades that move every position past the tolerance band back to its target
+            trades = df.loc[df['trade_shares'] != 0, [
+                'symbol', 'weight', 'target_weight', 'drift', 'trade_shares', 'trade_value'
+            ]].reset_index(drop=True)
             
             return {
                 'suggestions': suggestions,
+                'trades': trades,
                 'message': f'Generated {len(suggestions)} rebalancing suggestions'
             }
             
         except Exception as e:
             return {'suggestions': [], 'message': f'Error generating suggestions: {str(e)}'}
     
-    def export_portfolio_data(self, portfolio_data):
+    def export_portfolio_data(self, portfolio_data, holdings=None):
         """Export portfolio data to CSV format"""
         if not portfolio_data:
             return None
@@ -173,9 +178,10 @@ class PortfolioManager:
             df['timestamp'] = datetime.now()
             
             # Add calculated fields
-            total_value = df['current_price'].sum()
-            df['weight'] = df['current_price'] / total_value
-            df['total_value'] = total_value
+            analysis = self._analyze(portfolio_data, holdings)
+            df['quantity'] = analysis['quantity']
+            df['weight'] = analysis['weight']
+            df['total_value'] = analysis['market_value'].sum()
             
             return df.to_csv(index=False)
             
@@ -0,0 +1,211 @@
+import os
+import time
+import queue
+import itertools
+import threading
+from concurrent.futures import Future
+
+# Lower values are dispatched first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a request cannot be sent without exceeding the API quota"""
+
+    def __init__(self, message, daily=False):
+        super().__init__(message)
+        self.daily = daily
+
+
+class RequestNotSent(Exception):
+    """Raised by a request function when the request never reached the server"""
+
+
+class TokenBucket:
+    def __init__(self, capacity, period):
+        self.capacity = capacity
+        self.rate = capacity / period  # tokens per second
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """Seconds until a token is available (0 if one is available now)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def try_acquire(self):
+        """Take a token if one is available"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def refund(self):
+        """Return a token for a request that was never sent"""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+    def drain(self):
+        """Empty the bucket after the server reports the quota is used up"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = 0.0
+
+
+class _Job:
+    def __init__(self, key, func):
+        self.key = key
+        self.func = func
+        self.future = Future()
+        self.started = False
+
+
+class RequestScheduler:
+    def __init__(self, per_minute=5, per_day=25, max_workers=4):
+        self.minute_bucket = TokenBucket(per_minute, 60)
+        self.day_bucket = TokenBucket(per_day, 24 * 60 * 60)
+        self.max_workers = max_workers
+        self._queue = queue.PriorityQueue()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._workers = []
+
+    def submit(self, key, func, priority=PRIORITY_INTERACTIVE):
+        """Queue func() under key and return a Future; duplicate keys share one request"""
+        with self._lock:
+            job = self._in_flight.get(key)
+            if job is None:
+                job = _Job(key, func)
+                self._in_flight[key] = job
+            elif job.started:
+                return job.future
+
+            # Re-queueing an existing job lets a more urgent caller promote it;
+            # whichever entry is dequeued first runs it and the other is skipped
+            self._queue.put((priority, next(self._seq), job))
+            self._start_workers()
+            return job.future
+
+    def promote(self, key, priority):
+        """Re-queue a waiting job at a more urgent priority; no-op if it isn't queued"""
+        with self._lock:
+            job = self._in_flight.get(key)
+            if job is None or job.started:
+                return False
+            self._queue.put((priority, next(self._seq), job))
+            return True
+
+    def _start_workers(self):
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._run, name=f"request_scheduler_{len(self._workers)}", daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _run(self):
+        while True:
+            priority, seq, job = self._queue.get()
+
+            with self._lock:
+                if job.started:
+                    continue
+
+            # Out of daily quota: fail fast instead of blocking for hours
+            if self.day_bucket.wait_time() > 60:
+                self._finish(job, exception=RateLimitExceeded(
+                    "Daily API request quota exhausted", daily=True
+                ))
+                continue
+
+            # Wait for per-minute capacity, putting the job back so that a more
+            # urgent request arriving meanwhile is served first
+            wait = max(self.minute_bucket.wait_time(), self.day_bucket.wait_time())
+            if wait > 0 or not self._acquire():
+                self._queue.put((priority, seq, job))
+                time.sleep(min(max(wait, 0.05), 1.0))
+                continue
+
+            with self._lock:
+                if job.started:
+                    self.minute_bucket.refund()
+                    self.day_bucket.refund()
+                    continue
+                job.started = True
+
+            if not job.future.set_running_or_notify_cancel():
+                self._refund()
+                self._finish(job)
+                continue
+
+            try:
+                result = job.func()
+            except RequestNotSent as e:
+                self._refund()
+                self._finish(job, exception=e)
+            except RateLimitExceeded as e:
+                # The server disagrees with our accounting; stop sending until refill
+                self.minute_bucket.drain()
+                if e.daily:
+                    self.day_bucket.drain()
+                self._finish(job, exception=e)
+            except Exception as e:
+                self._finish(job, exception=e)
+            else:
+                self._finish(job, result=result)
+
+    def _acquire(self):
+        """Take one token from both buckets, or none"""
+        if not self.minute_bucket.try_acquire():
+            return False
+        if not self.day_bucket.try_acquire():
+            self.minute_bucket.refund()
+            return False
+        return True
+
+    def _refund(self):
+        self.minute_bucket.refund()
+        self.day_bucket.refund()
+
+    def _finish(self, job, result=None, exception=None):
+        with self._lock:
+            if self._in_flight.get(job.key) is job:
+                del self._in_flight[job.key]
+            job.started = True
+
+        if job.future.cancelled():
+            return
+        if not job.future.running():
+            job.future.set_running_or_notify_cancel()
+        if exception is not None:
+            job.future.set_exception(exception)
+        else:
+            job.future.set_result(result)
+
+
+_default_scheduler = None
+_default_scheduler_lock = threading.Lock()
+
+
+def get_default_scheduler():
+    """Get the process-wide scheduler shared by every DataFetcher"""
+    global _default_scheduler
+    with _default_scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = RequestScheduler(
+                per_minute=int(os.getenv("ALPHA_VANTAGE_REQUESTS_PER_MINUTE", "5")),
+                per_day=int(os.getenv("ALPHA_VANTAGE_REQUESTS_PER_DAY", "25"))
+            )
+        return _default_scheduler
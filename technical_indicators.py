@@ -1,66 +1,167 @@
+import threading
 import pandas as pd
 import numpy as np
+from indicator_engine import IncrementalIndicatorEngine, INDICATOR_COLUMNS
+from cache import LRUCache
+from utils import compact_frame
+
+# Raw OHLCV inputs available to every indicator
+BASE_INPUTS = ['open', 'high', 'low', 'close', 'volume']
+
+class IndicatorSpec:
+    def __init__(self, inputs, func, **params):
+        self.inputs = inputs    # raw columns or other registered indicators
+        self.func = func        # called as func(*input_values, **params)
+        self.params = params
 
 class TechnicalIndicators:
-    def __init__(self):
-        pass
-    
-    def calculate_indicators(self, data):
-        """Calculate various technical indicators"""
-        if data.empty:
-            return pd.DataFrame()
-        
-        indicators = pd.DataFrame(index=data.index)
-        
-        # Moving Averages
-        indicators['ma_5'] = data['close'].rolling(window=5).mean()
-        indicators['ma_10'] = data['close'].rolling(window=10).mean()
-        indicators['ma_20'] = data['close'].rolling(window=20).mean()
-        indicators['ma_50'] = data['close'].rolling(window=50).mean()
-        
-        # Exponential Moving Averages
-        indicators['ema_12'] = data['close'].ewm(span=12).mean()
-        indicators['ema_26'] = data['close'].ewm(span=26).mean()
-        
-        # MACD
-        indicators['macd'] = indicators['ema_12'] - indicators['ema_26']
-        indicators['macd_signal'] = indicators['macd'].ewm(span=9).mean()
-        indicators['macd_histogram'] = indicators['macd'] - indicators['macd_signal']
-        
-        # Bollinger Bands
-        indicators['bb_middle'] = indicators['ma_20']
-        bb_std = data['close'].rolling(window=20).std()
-        indicators['bb_upper'] = indicators['bb_middle'] + (bb_std * 2)
-        indicators['bb_lower'] = indicators['bb_middle'] - (bb_std * 2)
+    def __init__(self, compact=False):
+        # Opt-in float32 indicator output
+        self.compact = compact
         
-        # RSI
-        indicators['rsi'] = self._calculate_rsi(data['close'])
+        # Streaming engines keyed by caller (e.g. symbol and period), least recently used evicted
+        self.engines = LRUCache(ttl=None, max_entries=32)
+        self._engine_locks = [threading.Lock() for _ in range(32)]
         
-        # Stochastic Oscillator
-        stoch_k, stoch_d = self._calculate_stochastic(data)
-        indicators['stoch_k'] = stoch_k
-        indicators['stoch_d'] = stoch_d
-        
-        # Volume indicators
-        indicators['volume_ma'] = data['volume'].rolling(window=10).mean()
-        indicators['volume_ratio'] = data['volume'] / indicators['volume_ma']
+        # Evaluated nodes per (key, data version), so reruns on unchanged
+        # data and tabs sharing intermediates don't recompute anything
+        self.memo = LRUCache(ttl=None, max_entries=64, max_bytes=64 * 1024 * 1024)
+        # Striped locks so only callers evaluating the same memo entry wait for each other
+        self._memo_locks = [threading.Lock() for _ in range(32)]
+        self.registry = self._default_registry()
+    
+    def _default_registry(self):
+        """Indicator DAG; names starting with '_' are shared intermediates"""
+        rolling_mean = lambda series, window: series.rolling(window=window).mean()
+        ewm_mean = lambda series, span: series.ewm(span=span).mean()
         
-        # Price momentum
-        indicators['momentum'] = data['close'].pct_change(periods=10)
+        return {
+            # Moving Averages
+            'ma_5': IndicatorSpec(['close'], rolling_mean, window=5),
+            'ma_10': IndicatorSpec(['close'], rolling_mean, window=10),
+            'ma_20': IndicatorSpec(['close'], rolling_mean, window=20),
+            'ma_50': IndicatorSpec(['close'], rolling_mean, window=50),
+            
+            # Exponential Moving Averages
+            'ema_12': IndicatorSpec(['close'], ewm_mean, span=12),
+            'ema_26': IndicatorSpec(['close'], ewm_mean, span=26),
+            
+            # MACD
+            'macd': IndicatorSpec(['ema_12', 'ema_26'], lambda fast, slow: fast - slow),
+            'macd_signal': IndicatorSpec(['macd'], ewm_mean, span=9),
+            'macd_histogram': IndicatorSpec(['macd', 'macd_signal'], lambda macd, signal: macd - signal),
+            
+            # Bollinger Bands and volatility share one 20-day std
+            '_std_20': IndicatorSpec(['close'], lambda close, window: close.rolling(window=window).std(), window=20),
+            'bb_middle': IndicatorSpec(['ma_20'], lambda ma: ma),
+            'bb_upper': IndicatorSpec(['bb_middle', '_std_20'], lambda mid, std, width: mid + (std * width), width=2),
+            'bb_lower': IndicatorSpec(['bb_middle', '_std_20'], lambda mid, std, width: mid - (std * width), width=2),
+            'volatility': IndicatorSpec(['_std_20'], lambda std: std),
+            
+            # RSI
+            'rsi': IndicatorSpec(['close'], self._calculate_rsi, period=14),
+            
+            # Stochastic Oscillator and Williams %R share the 14-day extremes
+            '_lowest_low_14': IndicatorSpec(['low'], lambda low, window: low.rolling(window=window).min(), window=14),
+            '_highest_high_14': IndicatorSpec(['high'], lambda high, window: high.rolling(window=window).max(), window=14),
+            'stoch_k': IndicatorSpec(['close', '_lowest_low_14', '_highest_high_14'], self._calculate_stochastic_k),
+            'stoch_d': IndicatorSpec(['stoch_k'], rolling_mean, window=3),
+            'williams_r': IndicatorSpec(['close', '_lowest_low_14', '_highest_high_14'], self._calculate_williams_r),
+            
+            # Volume indicators
+            'volume_ma': IndicatorSpec(['volume'], rolling_mean, window=10),
+            'volume_ratio': IndicatorSpec(['volume', 'volume_ma'], lambda volume, volume_ma: volume / volume_ma),
+            
+            # Price momentum
+            'momentum': IndicatorSpec(['close'], lambda close, periods: close.pct_change(periods=periods), periods=10),
+            
+            # Average True Range (ATR)
+            'atr': IndicatorSpec(['high', 'low', 'close'], self._calculate_atr, period=14),
+            
+            # Commodity Channel Index (CCI)
+            '_typical_price': IndicatorSpec(['high', 'low', 'close'], lambda high, low, close: (high + low + close) / 3),
+            'cci': IndicatorSpec(['_typical_price'], self._calculate_cci, period=20),
+        }
+    
+    def register_indicator(self, name, inputs, func, **params):
+        """Add or replace an indicator; inputs are raw columns or registered indicator names"""
+        self.registry[name] = IndicatorSpec(inputs, func, **params)
+        self.memo.clear()
+    
+    def _evaluate(self, data, names, nodes):
+        """Evaluate the requested indicators and their dependencies once each into nodes"""
+        for name in names:
+            if name in nodes:
+                continue
+            if name in BASE_INPUTS:
+                nodes[name] = data[name]
+                continue
+            if name not in self.registry:
+                raise KeyError(f"Unknown indicator: {name}")
+            
+            spec = self.registry[name]
+            self._evaluate(data, spec.inputs, nodes)
+            nodes[name] = spec.func(*[nodes[i] for i in spec.inputs], **spec.params)
+        return nodes
+    
+    def _data_version(self, data):
+        """Cheap fingerprint that changes when bars are added or the last bar is revised"""
+        last = data.iloc[-1]
+        return (len(data), data.index[0], data.index[-1], float(last['close']), float(last['volume']))
+    
+    def calculate_indicators(self, data, columns=None, key=None):
+        """Calculate technical indicators (all by default, or just the requested columns)"""
+        if data.empty:
+            return pd.DataFrame()
         
-        # Volatility
-        indicators['volatility'] = data['close'].rolling(window=20).std()
+        columns = list(columns) if columns is not None else INDICATOR_COLUMNS
         
-        # Average True Range (ATR)
-        indicators['atr'] = self._calculate_atr(data)
+        if key is None:
+            nodes = self._evaluate(data, columns, {})
+        else:
+            memo_key = (key, self._data_version(data))
+            with self._memo_locks[hash(memo_key) % len(self._memo_locks)]:
+                nodes = self.memo.get(memo_key)
+                if nodes is None:
+                    nodes = {}
+                self._evaluate(data, columns, nodes)
+                self.memo.set(memo_key, nodes)
         
-        # Williams %R
-        indicators['williams_r'] = self._calculate_williams_r(data)
+        indicators = pd.DataFrame({name: nodes[name] for name in columns}, index=data.index)
+        if self.compact:
+            indicators = compact_frame(indicators)
+        return indicators
+    
+    def calculate_indicators_panel(self, close, high, low, volume):
+        """Calculate indicators for many symbols at once from wide (dates x symbols) frames"""
+        if close.empty:
+            return pd.DataFrame()
         
-        # Commodity Channel Index (CCI)
-        indicators['cci'] = self._calculate_cci(data)
+        # Every indicator only indexes its inputs by name, so a dict of aligned
+        # wide frames goes through the same column-wise code as one symbol
+        panel = {
+            'close': close,
+            'high': high.reindex(index=close.index, columns=close.columns),
+            'low': low.reindex(index=close.index, columns=close.columns),
+            'volume': volume.reindex(index=close.index, columns=close.columns)
+        }
+        nodes = self._evaluate(panel, INDICATOR_COLUMNS, {})
+        return pd.concat(
+            {name: nodes[name] for name in INDICATOR_COLUMNS}, axis=1, names=['indicator', 'symbol']
+        )
+    
+    def calculate_indicators_incremental(self, data, key):
+        """Calculate indicators for a growing series, only processing bars new since the last call for key"""
+        if data.empty:
+            return pd.DataFrame()
         
-        return indicators
+        with self._engine_locks[hash(key) % len(self._engine_locks)]:
+            engine = self.engines.get(key)
+            if engine is None or not engine.sync(data):
+                engine = IncrementalIndicatorEngine()
+                engine.extend(data)
+                self.engines.set(key, engine)
+            return engine.to_frame()
     
     def _calculate_rsi(self, prices, period=14):
         """Calculate Relative Strength Index"""
@@ -71,42 +172,60 @@ class TechnicalIndicators:
         rsi = 100 - (100 / (1 + rs))
         return rsi
     
-    def _calculate_stochastic(self, data, k_period=14, d_period=3):
-        """Calculate Stochastic Oscillator"""
-        lowest_low = data['low'].rolling(window=k_period).min()
-        highest_high = data['high'].rolling(window=k_period).max()
-        k_percent = 100 * ((data['close'] - lowest_low) / (highest_high - lowest_low))
-        d_percent = k_percent.rolling(window=d_period).mean()
-        return k_percent, d_percent
+    def _calculate_stochastic_k(self, close, lowest_low, highest_high):
+        """Calculate Stochastic Oscillator %K"""
+        return 100 * ((close - lowest_low) / (highest_high - lowest_low))
     
-    def _calculate_atr(self, data, period=14):
+    def _calculate_atr(self, high, low, close, period=14):
         """Calculate Average True Range"""
-        high_low = data['high'] - data['low']
-        high_close = np.abs(data['high'] - data['close'].shift())
-        low_close = np.abs(data['low'] - data['close'].shift())
+        high_low = high - low
+        high_close = np.abs(high - close.shift())
+        low_close = np.abs(low - close.shift())
         
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = ranges.max(axis=1)
+        # Element-wise max skipping NaN, so it works for a series or a panel
+        true_range = np.fmax(np.fmax(high_low, high_close), low_close)
         atr = true_range.rolling(window=period).mean()
         return atr
     
-    def _calculate_williams_r(self, data, period=14):
+    def _calculate_williams_r(self, close, lowest_low, highest_high):
         """Calculate Williams %R"""
-        highest_high = data['high'].rolling(window=period).max()
-        lowest_low = data['low'].rolling(window=period).min()
-        williams_r = -100 * ((highest_high - data['close']) / (highest_high - lowest_low))
+        williams_r = -100 * ((highest_high - close) / (highest_high - lowest_low))
         return williams_r
     
-    def _calculate_cci(self, data, period=20):
+    def _calculate_cci(self, typical_price, period=20):
         """Calculate Commodity Channel Index"""
-        typical_price = (data['high'] + data['low'] + data['close']) / 3
         sma = typical_price.rolling(window=period).mean()
-        mean_deviation = typical_price.rolling(window=period).apply(
-            lambda x: np.abs(x - x.mean()).mean()
-        )
+        deviation_values = self._rolling_mean_deviation(typical_price.to_numpy(dtype=float), period)
+        if isinstance(typical_price, pd.DataFrame):
+            mean_deviation = pd.DataFrame(
+                deviation_values, index=typical_price.index, columns=typical_price.columns
+            )
+        else:
+            mean_deviation = pd.Series(deviation_values, index=typical_price.index)
         cci = (typical_price - sma) / (0.015 * mean_deviation)
         return cci
     
+    def _rolling_mean_deviation(self, values, period):
+        """Rolling mean absolute deviation over a strided window view (no Python per-row calls)"""
+        result = np.full(values.shape, np.nan)
+        if len(values) < period:
+            return result
+        
+        if values.ndim == 1:
+            windows = np.lib.stride_tricks.sliding_window_view(values, period)
+            window_means = windows.mean(axis=1, keepdims=True)
+            result[period - 1:] = np.abs(windows - window_means).mean(axis=1)
+            return result
+        
+        # Panels: process column blocks so the temporaries stay bounded (~32 MB)
+        block = max(1, 4_000_000 // (len(values) * period))
+        for start in range(0, values.shape[1], block):
+            columns = slice(start, start + block)
+            windows = np.lib.stride_tricks.sliding_window_view(values[:, columns], period, axis=0)
+            window_means = windows.mean(axis=-1, keepdims=True)
+            result[period - 1:, columns] = np.abs(windows - window_means).mean(axis=-1)
+        return result
+    
     def get_trading_signals(self, data, indicators):
         """Generate trading signals based on technical indicators"""
         signals = pd.DataFrame(index=data.index)
@@ -140,30 +259,50 @@ class TechnicalIndicators:
         
         return signals
     
-    def get_support_resistance(self, data, window=20):
+    def get_support_resistance(self, data, window=20, tolerance=0.005):
         """Calculate support and resistance levels"""
         if len(data) < window:
-            return {'support': [], 'resistance': []}
+            return {'support': [], 'resistance': [], 'support_strength': [], 'resistance_strength': []}
         
         # Find local minima and maxima
-        highs = data['high'].rolling(window=window, center=True).max()
-        lows = data['low'].rolling(window=window, center=True).min()
+        highs = data['high'].rolling(window=window, center=True).max().to_numpy()
+        lows = data['low'].rolling(window=window, center=True).min().to_numpy()
+        high_values = data['high'].to_numpy()
+        low_values = data['low'].to_numpy()
         
-        # Identify support and resistance levels
-        resistance_levels = []
-        support_levels = []
+        # Pivots are bars equal to their centered extreme, away from the edges
+        inner = np.zeros(len(data), dtype=bool)
+        inner[window:len(data) - window] = True
+        resistance_pivots = high_values[inner & (high_values == highs)]
+        support_pivots = low_values[inner & (low_values == lows)]
         
-        for i in range(window, len(data) - window):
-            if data['high'].iloc[i] == highs.iloc[i]:
-                resistance_levels.append(data['high'].iloc[i])
-            if data['low'].iloc[i] == lows.iloc[i]:
-                support_levels.append(data['low'].iloc[i])
-        
-        # Remove duplicates and sort
-        resistance_levels = sorted(list(set(resistance_levels)), reverse=True)
-        support_levels = sorted(list(set(support_levels)))
+        resistance_levels, resistance_strength = self._cluster_levels(resistance_pivots, tolerance)
+        support_levels, support_strength = self._cluster_levels(support_pivots, tolerance)
         
         return {
-            'resistance': resistance_levels[:5],  # Top 5 resistance levels
-            'support': support_levels[-5:]       # Top 5 support levels
+            'resistance': resistance_levels[::-1][:5].tolist(),           # Top 5 resistance levels
+            'resistance_strength': resistance_strength[::-1][:5].tolist(),
+            'support': support_levels[-5:].tolist(),                       # Top 5 support levels
+            'support_strength': support_strength[-5:].tolist()
         }
+    
+    def _cluster_levels(self, prices, tolerance):
+        """Merge prices within a relative tolerance into sorted (levels, touch counts)"""
+        if len(prices) == 0:
+            return np.array([]), np.array([], dtype=int)
+        
+        # Walk the sorted prices and start a new level once a price is more than
+        # `tolerance` above the level's first (anchor) price. Unlike fixed grid
+        # cells this never splits two pivots that are within tolerance of the
+        # anchor, and a level can't drift by chaining nearby pivots together
+        prices = np.sort(prices)
+        cluster_ids = np.empty(len(prices), dtype=int)
+        cluster, anchor = 0, prices[0]
+        for i, price in enumerate(prices):
+            if price / anchor - 1 > tolerance:
+                cluster, anchor = cluster + 1, price
+            cluster_ids[i] = cluster
+        
+        touches = np.bincount(cluster_ids)
+        levels = np.bincount(cluster_ids, weights=prices) / touches
+        return levels, touches
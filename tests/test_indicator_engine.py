@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from indicator_engine import IncrementalIndicatorEngine, INDICATOR_COLUMNS
+from technical_indicators import TechnicalIndicators
+
+
+def make_bars(n_rows, seed=0, flat=False, nan_rows=()):
+    """Random-walk (or constant) OHLCV bars on a daily index"""
+    rng = np.random.default_rng(seed)
+    if flat:
+        close = np.full(n_rows, 100.0)
+        high, low = close.copy(), close.copy()
+    else:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_rows)))
+        high = close * (1 + rng.uniform(0, 0.02, n_rows))
+        low = close * (1 - rng.uniform(0, 0.02, n_rows))
+    data = pd.DataFrame({
+        'open': close,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': rng.integers(1_000, 100_000, n_rows).astype(float)
+    }, index=pd.date_range('2020-01-01', periods=n_rows, freq='D', name='date'))
+    for row in nan_rows:
+        data.iloc[row, :] = np.nan
+    return data
+
+
+def assert_matches_batch(engine, data):
+    expected = TechnicalIndicators().calculate_indicators(data)[INDICATOR_COLUMNS]
+    pd.testing.assert_frame_equal(engine.to_frame(), expected, check_freq=False, rtol=1e-7, atol=1e-7)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_walk_matches_batch(seed):
+    data = make_bars(300, seed=seed)
+    engine = IncrementalIndicatorEngine()
+    engine.extend(data)
+    assert_matches_batch(engine, data)
+
+
+def test_bar_by_bar_matches_extend():
+    data = make_bars(120, seed=7)
+    engine = IncrementalIndicatorEngine()
+    for timestamp, bar in data.iterrows():
+        engine.update(timestamp, bar['high'], bar['low'], bar['close'], bar['volume'])
+    engine.index_name = data.index.name
+    assert_matches_batch(engine, data)
+
+
+def test_flat_series_matches_batch():
+    data = make_bars(100, flat=True)
+    engine = IncrementalIndicatorEngine()
+    engine.extend(data)
+    assert_matches_batch(engine, data)
+
+
+def test_nan_bars_match_batch():
+    data = make_bars(200, seed=3, nan_rows=(0, 25, 26, 120))
+    engine = IncrementalIndicatorEngine()
+    engine.extend(data)
+    assert_matches_batch(engine, data)
+
+
+def test_revised_last_bar_matches_batch():
+    data = make_bars(150, seed=11)
+    engine = IncrementalIndicatorEngine()
+    engine.extend(data)
+
+    # The session's partial bar is revised a few times before the close
+    for close in (data['close'].iloc[-1] * 1.01, data['close'].iloc[-1] * 0.97):
+        data.iloc[-1, data.columns.get_loc('close')] = close
+        data.iloc[-1, data.columns.get_loc('high')] = max(data['high'].iloc[-1], close)
+        assert engine.sync(data)
+        assert_matches_batch(engine, data)
+
+
+def test_sync_appends_new_bars_and_rebuilds_on_gap():
+    data = make_bars(160, seed=5)
+    engine = IncrementalIndicatorEngine()
+    engine.extend(data.iloc[:100])
+    assert engine.sync(data)
+    assert_matches_batch(engine, data)
+
+    # A frame that doesn't continue the bars already seen can't be synced
+    assert not engine.sync(data.iloc[10:])
+
+
+def test_incremental_engines_are_bounded():
+    indicators = TechnicalIndicators()
+    data = make_bars(60, seed=1)
+    for i in range(indicators.engines.max_entries + 10):
+        indicators.calculate_indicators_incremental(data, ('SYM%d' % i, '1D'))
+    assert len(indicators.engines) == indicators.engines.max_entries
@@ -0,0 +1,83 @@
+import random
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+from ml_predictor import MLPredictor
+
+SYMBOLS = ['SYM%d' % i for i in range(12)]
+LENGTHS = (120, 121, 125)
+BACKENDS = ('linear', 'ridge')
+N_THREADS = 16
+COMPARED = [
+    'next_day', 'confidence', 'lower_bound', 'upper_bound', 'future_predictions',
+    'forecast_lower', 'forecast_upper', 'train_score', 'test_score', 'mse'
+]
+
+
+def make_history(seed, n_rows):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_rows)))
+    return pd.DataFrame({
+        'open': close * (1 + rng.normal(0, 0.005, n_rows)),
+        'high': close * (1 + rng.uniform(0, 0.02, n_rows)),
+        'low': close * (1 - rng.uniform(0, 0.02, n_rows)),
+        'close': close,
+        'volume': rng.integers(1_000, 100_000, n_rows).astype(float)
+    }, index=pd.date_range('2023-01-02', periods=n_rows, freq='B', name='date'))
+
+
+@pytest.fixture(scope='module')
+def histories():
+    # Each symbol is refreshed with a few more bars, like successive reruns
+    full = {symbol: make_history(seed, max(LENGTHS)) for seed, symbol in enumerate(SYMBOLS)}
+    return {(symbol, n_rows): full[symbol].iloc[:n_rows] for symbol in SYMBOLS for n_rows in LENGTHS}
+
+
+def tasks():
+    return [(symbol, n_rows, backend) for symbol in SYMBOLS for n_rows in LENGTHS for backend in BACKENDS]
+
+
+def predict(predictor, histories, task):
+    symbol, n_rows, backend = task
+    return predictor.predict_prices(histories[symbol, n_rows], symbol, '1Y', horizon=10, backend=backend)
+
+
+def test_shared_predictor_matches_single_threaded(histories, tmp_path):
+    reference = MLPredictor(model_dir=str(tmp_path / 'reference'))
+    expected = {task: predict(reference, histories, task) for task in tasks()}
+    assert not any('error' in result for result in expected.values())
+
+    shared = MLPredictor(model_dir=str(tmp_path / 'shared'))
+    results = []
+    errors = []
+    start = threading.Barrier(N_THREADS)
+
+    def worker(seed):
+        # Every thread runs every task, in its own order, against the one predictor
+        order = tasks()
+        random.Random(seed).shuffle(order)
+        start.wait()
+        try:
+            for task in order:
+                results.append((task, predict(shared, histories, task)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(seed,)) for seed in range(N_THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert len(results) == N_THREADS * len(tasks())
+    # Incremental model updates can run in a different order than the
+    # reference, so allow for rounding but nothing more
+    for task, result in results:
+        assert 'error' not in result, (task, result)
+        assert result['backend'] == expected[task]['backend']
+        for field in COMPARED:
+            np.testing.assert_allclose(
+                result[field], expected[task][field], rtol=1e-6, atol=1e-6, err_msg=f'{task} {field}'
+            )
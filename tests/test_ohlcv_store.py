@@ -0,0 +1,81 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+import pytz
+import pytest
+from ohlcv_store import OHLCVStore, latest_session_close
+
+EASTERN = pytz.timezone('US/Eastern')
+
+
+def at(*args):
+    return EASTERN.localize(datetime(*args))
+
+
+def bars(start, end, close=100.0):
+    index = pd.bdate_range(start, end, name='date')
+    return pd.DataFrame({
+        'open': close, 'high': close + 1, 'low': close - 1, 'close': close, 'volume': 1000
+    }, index=index).astype({'volume': np.int64})
+
+
+@pytest.fixture
+def store(tmp_path):
+    return OHLCVStore(str(tmp_path))
+
+
+@pytest.mark.parametrize('now, expected', [
+    (at(2025, 6, 13, 15, 59), at(2025, 6, 12, 16)),   # before Friday's close
+    (at(2025, 6, 13, 16, 0), at(2025, 6, 13, 16)),
+    (at(2025, 6, 15, 12, 0), at(2025, 6, 13, 16)),    # Sunday
+    (at(2025, 4, 18, 18, 0), at(2025, 4, 17, 16)),    # Good Friday
+    (at(2025, 11, 28, 10, 0), at(2025, 11, 26, 16)),  # the day after Thanksgiving, before the close
+    (at(2025, 3, 10, 10, 0), at(2025, 3, 7, 16)),     # first Monday after the DST change
+])
+def test_latest_session_close(now, expected):
+    close = latest_session_close(now)
+    assert close == expected
+    assert close.astimezone(EASTERN).hour == 16
+
+
+def test_partial_session_bar_is_not_persisted(store):
+    # Mid-session Friday: the response already carries Friday's partial bar
+    data = bars('2025-06-02', '2025-06-13')
+    store.append('AAPL', data, now=at(2025, 6, 13, 12, 0))
+    assert store.last_date('AAPL') == pd.Timestamp('2025-06-12')
+    assert store.is_fresh('AAPL', now=at(2025, 6, 13, 15, 0))
+    assert not store.is_fresh('AAPL', now=at(2025, 6, 13, 16, 30))
+
+    # After the close the final bar is stored and the symbol is fresh
+    store.append('AAPL', bars('2025-06-12', '2025-06-13', close=101.0), now=at(2025, 6, 13, 17, 0))
+    stored = store.load('AAPL')
+    assert stored.index[-1] == pd.Timestamp('2025-06-13')
+    assert stored['close'].iloc[-1] == 101.0
+    assert len(stored) == len(data)
+    assert store.is_fresh('AAPL', now=at(2025, 6, 16, 15, 0))
+
+
+def test_check_before_bar_is_published_is_not_fresh(store):
+    # Fetched just after Friday's close, before the provider published Friday's bar
+    store.append('AAPL', bars('2025-06-02', '2025-06-12'), now=at(2025, 6, 13, 16, 5))
+    assert store.last_date('AAPL') == pd.Timestamp('2025-06-12')
+    for now in (at(2025, 6, 13, 18, 0), at(2025, 6, 15, 12, 0), at(2025, 6, 16, 15, 0)):
+        assert not store.is_fresh('AAPL', now=now)
+
+
+def test_holiday_needs_no_bar(store):
+    # Thanksgiving: Wednesday's bar is the latest one expected until Friday's close
+    store.append('AAPL', bars('2025-11-17', '2025-11-26'), now=at(2025, 11, 26, 18, 0))
+    assert store.is_fresh('AAPL', now=at(2025, 11, 27, 12, 0))
+    assert store.is_fresh('AAPL', now=at(2025, 11, 28, 12, 0))
+    assert not store.is_fresh('AAPL', now=at(2025, 11, 28, 16, 30))
+
+
+def test_unscheduled_closure_stops_rechecking_after_grace(store):
+    # 2025-01-09 was a one-off closure; no bar ever appears for it
+    store.append('AAPL', bars('2025-01-02', '2025-01-08'), now=at(2025, 1, 9, 16, 30))
+    assert not store.is_fresh('AAPL', now=at(2025, 1, 9, 17, 0))
+
+    store.append('AAPL', bars('2025-01-02', '2025-01-08'), now=at(2025, 1, 9, 23, 0))
+    assert store.is_fresh('AAPL', now=at(2025, 1, 10, 12, 0))
+    assert not store.is_fresh('AAPL', now=at(2025, 1, 10, 16, 30))
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('streamlit')
+
+from holdings import Holdings
+from portfolio_manager import PortfolioManager
+
+
+def quote(symbol, price, change_percent):
+    return {'symbol': symbol, 'current_price': price, 'change': price * change_percent / 100,
+            'change_percent': change_percent, 'volume': 1000}
+
+
+def test_failed_quotes_are_priced_as_unknown():
+    manager = PortfolioManager()
+    portfolio_data = [quote('AAA', 100.0, 2.0), manager._performance_row('BBB', None), quote('CCC', 50.0, -1.0)]
+    holdings = Holdings.from_lots(['AAA', 'BBB', 'CCC'], [10, 5, 20], [90.0, 40.0, np.nan])
+
+    metrics = manager.calculate_portfolio_metrics(portfolio_data, holdings)
+
+    assert metrics['total_value'] == pytest.approx(10 * 100 + 20 * 50)
+    assert metrics['unrealized_pnl'] == pytest.approx(10 * (100 - 90))
+    assert metrics['average_change_percent'] == pytest.approx(0.5)
+    assert metrics['worst_performer']['symbol'] == 'CCC'
+    assert metrics['num_quoted'] == 2
+
+    analysis = manager._analyze(portfolio_data, holdings).set_index('symbol')
+    assert np.isnan(analysis.loc['BBB', 'weight'])
+    assert analysis.loc['AAA', 'weight'] == pytest.approx(0.5)
+
+
+def test_all_quotes_failed():
+    manager = PortfolioManager()
+    metrics = manager.calculate_portfolio_metrics([manager._performance_row('AAA', None)])
+    assert metrics['total_value'] == 0
+    assert metrics['best_performer'] == {}
@@ -0,0 +1,158 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pytest
+
+pytest.importorskip('streamlit')
+
+from data_fetcher import DataFetcher
+from rate_limiter import RequestScheduler, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+
+DAILY_LIMIT = {'Information': 'Thank you for using Alpha Vantage! Our standard API rate limit is 25 requests per day.'}
+DEMO_NOTICE = {'Information': 'The **demo** API key is for demo purposes only. Please claim your free API key.'}
+PREMIUM_NOTICE = {'Information': 'Thank you for using Alpha Vantage! This is a premium endpoint.'}
+MINUTE_LIMIT = {'Note': 'Our standard API call frequency is 5 calls per minute.'}
+
+
+class FakeAlphaVantage(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        symbol = parse_qs(urlparse(self.path).query)['symbol'][0]
+        with server.lock:
+            server.seen.append(symbol)
+        if symbol == 'BLOCK':
+            server.release.wait(5)
+
+        body = json.dumps(server.responses.get(symbol, {'Global Quote': {'01. symbol': symbol}})).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), FakeAlphaVantage)
+    httpd.seen, httpd.responses = [], {}
+    httpd.lock, httpd.release = threading.Lock(), threading.Event()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.release.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_fetcher(url, tmp_path, **scheduler_args):
+    scheduler = RequestScheduler(**{'per_minute': 100, 'per_day': 1000, 'max_workers': 1, **scheduler_args})
+    return DataFetcher('test', store_dir=str(tmp_path), base_url=url, scheduler=scheduler)
+
+
+def quote(fetcher, symbol, priority=PRIORITY_INTERACTIVE):
+    return fetcher._make_request({'function': 'GLOBAL_QUOTE', 'symbol': symbol}, priority)
+
+
+def start(fetcher, symbol, priority=PRIORITY_INTERACTIVE):
+    thread = threading.Thread(target=quote, args=(fetcher, symbol, priority))
+    thread.start()
+    return thread
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def url(server):
+    return f'http://127.0.0.1:{server.server_address[1]}/query'
+
+
+def test_interactive_requests_jump_the_queue(server, tmp_path):
+    fetcher = make_fetcher(url(server), tmp_path)
+    threads = [start(fetcher, 'BLOCK')]
+    wait_until(lambda: server.seen == ['BLOCK'])
+
+    # The single worker is busy, so these queue up behind it
+    threads += [start(fetcher, symbol, PRIORITY_BACKGROUND) for symbol in ('BG1', 'BG2')]
+    wait_until(lambda: fetcher.scheduler._queue.qsize() == 2)
+    threads.append(start(fetcher, 'FG'))
+    wait_until(lambda: fetcher.scheduler._queue.qsize() == 3)
+
+    server.release.set()
+    for thread in threads:
+        thread.join()
+    assert server.seen == ['BLOCK', 'FG', 'BG1', 'BG2']
+
+
+def test_identical_requests_are_coalesced(server, tmp_path):
+    fetcher = make_fetcher(url(server), tmp_path)
+    threads = [start(fetcher, 'BLOCK')]
+    wait_until(lambda: server.seen == ['BLOCK'])
+
+    results = []
+    callers = [threading.Thread(target=lambda: results.append(quote(fetcher, 'AAPL'))) for _ in range(5)]
+    for thread in callers:
+        thread.start()
+    wait_until(lambda: len(fetcher.scheduler._in_flight) == 2)
+
+    server.release.set()
+    for thread in threads + callers:
+        thread.join()
+    assert server.seen == ['BLOCK', 'AAPL']
+    assert results == [{'Global Quote': {'01. symbol': 'AAPL'}}] * 5
+
+
+def test_request_not_sent_is_refunded(tmp_path):
+    # Nothing listens on this port, so the connection is refused before any quota is used
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    fetcher = make_fetcher(f'http://127.0.0.1:{port}/query', tmp_path, per_minute=5, per_day=25)
+
+    assert quote(fetcher, 'AAPL') is None
+    assert fetcher.scheduler.minute_bucket.tokens == pytest.approx(5)
+    assert fetcher.scheduler.day_bucket.tokens == pytest.approx(25)
+
+
+def test_daily_limit_drains_the_day_bucket(server, tmp_path):
+    server.responses['LIMIT'] = DAILY_LIMIT
+    fetcher = make_fetcher(url(server), tmp_path)
+
+    assert quote(fetcher, 'LIMIT') is None
+    assert fetcher.scheduler.day_bucket.wait_time() > 60
+
+    # Later requests fail fast without reaching the server
+    assert quote(fetcher, 'AAPL') is None
+    assert server.seen == ['LIMIT']
+
+
+@pytest.mark.parametrize('payload', [DEMO_NOTICE, PREMIUM_NOTICE])
+def test_other_information_is_an_ordinary_error(server, tmp_path, payload):
+    server.responses['NOTICE'] = payload
+    fetcher = make_fetcher(url(server), tmp_path, per_day=25)
+
+    assert quote(fetcher, 'NOTICE') is None
+    # The notice spent one request and nothing more
+    assert fetcher.scheduler.day_bucket.tokens == pytest.approx(24, abs=0.01)
+    assert fetcher.scheduler.day_bucket.wait_time() == 0
+
+    assert quote(fetcher, 'AAPL') == {'Global Quote': {'01. symbol': 'AAPL'}}
+    assert server.seen == ['NOTICE', 'AAPL']
+
+
+def test_minute_limit_drains_only_the_minute_bucket(server, tmp_path):
+    server.responses['BUSY'] = MINUTE_LIMIT
+    fetcher = make_fetcher(url(server), tmp_path, per_minute=5, per_day=25)
+
+    assert quote(fetcher, 'BUSY') is None
+    assert fetcher.scheduler.minute_bucket.wait_time() > 0
+    assert fetcher.scheduler.day_bucket.wait_time() == 0
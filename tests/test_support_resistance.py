@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from technical_indicators import TechnicalIndicators
+
+
+def test_cluster_levels_merges_within_tolerance_of_anchor():
+    levels, touches = TechnicalIndicators()._cluster_levels(np.array([100.51, 99.0, 100.0, 100.3, 101.2]), 0.005)
+    np.testing.assert_allclose(levels, [99.0, 100.15, 100.51, 101.2])
+    assert touches.tolist() == [1, 2, 1, 1]
+
+
+def test_cluster_levels_does_not_chain():
+    # Each step is inside the tolerance, but the whole run spans ~3%
+    prices = 100 + 0.3 * np.arange(10)
+    levels, touches = TechnicalIndicators()._cluster_levels(prices, 0.005)
+    assert len(levels) == 5
+    assert touches.sum() == len(prices)
+
+
+def test_support_resistance_levels_are_sorted_outward():
+    rng = np.random.default_rng(0)
+    close = 100 + np.cumsum(rng.normal(0, 1, 400))
+    data = pd.DataFrame({'high': close + 1, 'low': close - 1, 'close': close})
+    levels = TechnicalIndicators().get_support_resistance(data)
+    assert levels['resistance'] == sorted(levels['resistance'], reverse=True)
+    assert levels['support'] == sorted(levels['support'])
+    assert len(levels['resistance']) == len(levels['resistance_strength'])
@@ -165,6 +165,60 @@ def smooth_data(data, method='rolling', window=5):
     else:
         return data
 
+def compact_frame(df):
+    """Downcast a price/indicator frame to float32 and unsigned volume where lossless"""
+    if df is None or df.empty:
+        return df
+    
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if pd.api.types.is_float_dtype(values):
+            columns[col] = values.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(values) and values.min() >= 0:
+            dtype = np.uint32 if values.max() <= np.iinfo(np.uint32).max else np.uint64
+            columns[col] = values.astype(dtype)
+        else:
+            columns[col] = values
+    
+    compacted = pd.DataFrame(columns, index=df.index)
+    compacted.attrs = df.attrs
+    return compacted
+
+def memory_report(n_bars=252, n_symbols=500, n_indicators=22):
+    """Compare resident memory of default vs compact frames for a bars x symbols workload"""
+    from frame_view import JoinedFrame
+    
+    index = pd.bdate_range(end=datetime.now(), periods=n_bars)
+    rng = np.random.default_rng(0)
+    prices = pd.DataFrame(
+        rng.random((n_bars, 4)) * 100, index=index, columns=['open', 'high', 'low', 'close']
+    )
+    prices['volume'] = rng.integers(0, 10_000_000, n_bars)
+    indicators = pd.DataFrame(
+        rng.random((n_bars, n_indicators)), index=index,
+        columns=[f'indicator_{i}' for i in range(n_indicators)]
+    )
+    
+    def block_bytes(frame):
+        return int(frame.memory_usage(index=False, deep=True).sum())
+    
+    index_bytes = int(index.memory_usage(deep=True))
+    default_merged = pd.concat([prices, indicators], axis=1)
+    compact_view = JoinedFrame(compact_frame(prices), compact_frame(indicators))
+    
+    # Per symbol: the cached price block stays resident next to the merged copy
+    default_bytes = block_bytes(prices) + block_bytes(default_merged) + index_bytes
+    compact_bytes = sum(block_bytes(frame) for frame in compact_view.frames) + index_bytes
+    
+    report = pd.DataFrame({
+        'mode': ['float64 + concat', 'float32 + lazy view'],
+        'bytes_per_symbol': [default_bytes, compact_bytes],
+    })
+    report['total_mb'] = report['bytes_per_symbol'] * n_symbols / 1e6
+    report['reduction'] = default_bytes / report['bytes_per_symbol']
+    return report
+
 def validate_stock_symbol(symbol):
     """Validate stock symbol format"""
     if not symbol: